@@ -9,7 +9,7 @@ import pytest
 import yaml
 from pystac import Catalog
 
-from deep_code.tools.publish import Publisher
+from deep_code.tools.publish import GitHubPublisher, Publisher
 from deep_code.utils.ogc_api_record import LinksBuilder
 
 
@@ -125,6 +125,9 @@ class TestPublisher(unittest.TestCase):
             mock_gp.call_args.kwargs["repo_name"]
             == "open-science-catalog-metadata-testing"
         )
+        assert mock_gp.call_args.kwargs["keep_clone"] is False
+        Publisher(keep_clone=True)
+        assert mock_gp.call_args.kwargs["keep_clone"] is True
 
     @patch.object(Publisher, "_write_stac_catalog_to_s3")
     @patch.object(Publisher, "publish_dataset", return_value={"a": {}})
@@ -197,7 +200,13 @@ class TestPublisher(unittest.TestCase):
         assert "workflow/experiment: wf" in kwargs["commit_message"]
         assert "dataset: col" in kwargs["pr_title"]
         assert "workflow/experiment: wf" in kwargs["pr_title"]
+        assert kwargs["use_git"] is True
 
+        self.publisher.publish(write_to_file=False, mode="all", use_git=False)
+        assert (
+            self.publisher.gh_publisher.publish_files.call_args.kwargs["use_git"]
+            is False
+        )
 
     # ------------------------------------------------------------------
     # S3 credential resolution
@@ -268,11 +277,14 @@ class TestPublisher(unittest.TestCase):
 
         self.assertEqual(mock_fsspec_open.call_count, 2)
         mock_fsspec_open.assert_any_call(
-            "s3://bucket/catalog.json", "w", key="k", secret="s"
+            "s3://bucket/catalog.json", "wb", key="k", secret="s"
         )
         mock_fsspec_open.assert_any_call(
-            "s3://bucket/col/item.json", "w", key="k", secret="s"
+            "s3://bucket/col/item.json", "wb", key="k", secret="s"
         )
+        self.assertEqual(mock_file.write.call_count, 2)
+        written = mock_file.write.call_args_list[0].args[0]
+        self.assertEqual(json.loads(written), {"type": "Catalog", "id": "test"})
 
     # ------------------------------------------------------------------
     # End-to-end zarr STAC publishing wired into publish()
@@ -555,6 +567,38 @@ class TestPublisher(unittest.TestCase):
         self.assertEqual(result, {})
 
 
+class TestGitHubPublisherPublishFiles(unittest.TestCase):
+    def setUp(self):
+        # Bypass __init__, which reads .gitaccess and forks/clones
+        self.gh_publisher = GitHubPublisher.__new__(GitHubPublisher)
+        self.gh_publisher.github_automation = MagicMock()
+        self.gha = self.gh_publisher.github_automation
+        self.gha.create_pull_request.return_value = "PR_URL"
+        self.files = {"a.json": {"k": "v"}}
+
+    def test_publish_files_with_git(self):
+        pr_url = self.gh_publisher.publish_files(
+            "feat", self.files, "msg", "title", "body"
+        )
+        self.assertEqual(pr_url, "PR_URL")
+        self.gha.add_files.assert_called_once_with(self.files)
+        self.gha.commit_and_push.assert_called_once_with("feat", "msg")
+        self.gha.commit_files_via_api.assert_not_called()
+        self.gha.clean_up.assert_called_once()
+
+    def test_publish_files_via_api(self):
+        pr_url = self.gh_publisher.publish_files(
+            "feat", self.files, "msg", "title", "body", use_git=False
+        )
+        self.assertEqual(pr_url, "PR_URL")
+        self.gha.sync_fork_via_api.assert_called_once_with("main")
+        self.gha.commit_files_via_api.assert_called_once_with(
+            "feat", self.files, "msg", base_branch="main"
+        )
+        self.gha.clone_sync_repository.assert_not_called()
+        self.gha.commit_and_push.assert_not_called()
+
+
 class TestParseGithubNotebookUrl:
     @pytest.mark.parametrize(
         "url,repo_url,repo_name,branch,file_path",
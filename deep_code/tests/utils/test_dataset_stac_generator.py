@@ -18,13 +18,21 @@ from deep_code.constants import (
     VARIABLE_BASE_CATALOG_SELF_HREF,
     ZARR_MEDIA_TYPE,
 )
-from deep_code.utils.dataset_stac_generator import OscDatasetStacGenerator, Theme
+from deep_code.utils.dataset_stac_generator import (
+    OscDatasetStacGenerator,
+    Theme,
+    _open_metadata_dataset,
+)
 
 
 class TestOSCProductSTACGenerator(unittest.TestCase):
-    @patch("deep_code.utils.dataset_stac_generator.open_dataset")
-    def setUp(self, mock_data_store):
+    def setUp(self):
         """Set up a mock dataset and generator."""
+        _open_metadata_dataset.cache_clear()
+        # The dataset is opened lazily, so keep the patch active for the test
+        patcher = patch("deep_code.utils.dataset_stac_generator.open_dataset")
+        mock_data_store = patcher.start()
+        self.addCleanup(patcher.stop)
         self.mock_dataset = Dataset(
             coords={
                 "lon": ("lon", np.linspace(-180, 180, 10)),
@@ -120,6 +128,13 @@ class TestOSCProductSTACGenerator(unittest.TestCase):
         self.assertIn("var2", meta_dict)
         self.assertIsInstance(meta_dict["var1"], dict)
 
+    def test_timestamps_shared_within_generator_run(self):
+        """All objects built by one generator carry the same timestamp."""
+        collection = self.generator.build_dataset_stac_collection(mode="dataset")
+        project = self.generator.build_project_collection()
+        self.assertEqual(collection.extra_fields["created"], project["created"])
+        self.assertEqual(project["created"], project["updated"])
+
     def test_build_theme(self):
         """Test Theme builder static method."""
         themes = ["a", "b"]
@@ -140,6 +155,11 @@ class TestOSCProductSTACGenerator(unittest.TestCase):
         self.assertEqual(catalog.title, "Var1")
         # Self href ends with var1/catalog.json
         self.assertTrue(catalog.self_href.endswith("/var1/catalog.json"))
+        root = catalog.get_single_link("root")
+        self.assertEqual(root.target, "../../catalog.json")
+        self.assertIs(root.owner, catalog)
+        parent = catalog.get_single_link("parent")
+        self.assertEqual(parent.title, "Variables")
 
     def test_update_product_base_catalog(self):
         """Child link is appended; existing links (including self) are untouched."""
@@ -242,6 +262,30 @@ class TestOSCProductSTACGenerator(unittest.TestCase):
         )
         self.assertEqual(gen.osc_project, "my-custom-project")
 
+    def test_build_dataset_stac_collection_fixed_fields_and_links(self):
+        collection = self.generator.build_dataset_stac_collection(mode="dataset")
+        fields = collection.extra_fields
+        self.assertEqual(fields["osc:project"], "deep-earth-system-data-lab")
+        self.assertEqual(fields["osc:type"], "product")
+        self.assertEqual(fields["osc:status"], "ongoing")
+        self.assertEqual(fields["osc:region"], "Global")
+        self.assertEqual(fields["created"], fields["updated"])
+
+        (root,) = collection.get_links("root")
+        self.assertEqual(root.target, "../../catalog.json")
+        (parent,) = collection.get_links("parent")
+        self.assertEqual((parent.target, parent.title), ("../catalog.json", "Products"))
+        self.assertIs(parent.owner, collection)
+
+    def test_build_dataset_stac_collection_validate_flag(self):
+        self.generator.osc_status = None
+        with self.assertRaisesRegex(ValueError, "osc:status"):
+            self.generator.build_dataset_stac_collection(mode="dataset")
+        collection = self.generator.build_dataset_stac_collection(
+            mode="dataset", validate=False
+        )
+        self.assertIsNone(collection.extra_fields["osc:status"])
+
     def test_build_dataset_stac_collection_osc_project_in_related_link(self):
         """The project-related link in the collection uses the configured osc_project."""
         collection = self.generator.build_dataset_stac_collection(mode="dataset")
@@ -612,16 +656,20 @@ class TestFormatString(unittest.TestCase):
 class TestOscDatasetStacGeneratorExtra(unittest.TestCase):
     """Additional tests to cover branches not exercised by TestOSCProductSTACGenerator."""
 
+    def setUp(self):
+        _open_metadata_dataset.cache_clear()
+
     def _make_generator(self, mock_ds, collection_id="my-collection", **kwargs):
-        with patch("deep_code.utils.dataset_stac_generator.open_dataset", return_value=mock_ds):
-            return OscDatasetStacGenerator(
-                dataset_id="test.zarr",
-                collection_id=collection_id,
-                workflow_id="wf",
-                workflow_title="WF",
-                license_type="CC-BY-4.0",
-                **kwargs,
-            )
+        gen = OscDatasetStacGenerator(
+            dataset_id="test.zarr",
+            collection_id=collection_id,
+            workflow_id="wf",
+            workflow_title="WF",
+            license_type="CC-BY-4.0",
+            **kwargs,
+        )
+        gen.dataset = mock_ds
+        return gen
 
     def _make_dataset(self, coord_type="lon_lat"):
         import numpy as np
@@ -649,6 +697,53 @@ class TestOscDatasetStacGeneratorExtra(unittest.TestCase):
         from xarray import Dataset
         return Dataset(coords=coords)
 
+    @patch("deep_code.utils.dataset_stac_generator.open_dataset")
+    def test_dataset_reused_across_generators(self, mock_open_ds):
+        mock_open_ds.return_value = self._make_dataset()
+        kwargs = dict(
+            dataset_id="test.zarr",
+            workflow_id="wf",
+            workflow_title="WF",
+            license_type="CC-BY-4.0",
+        )
+        gen1 = OscDatasetStacGenerator(collection_id="first", **kwargs)
+        gen2 = OscDatasetStacGenerator(collection_id="second", **kwargs)
+        # Constructing a generator does not open the dataset
+        mock_open_ds.assert_not_called()
+        self.assertIs(gen1.dataset, gen2.dataset)
+        mock_open_ds.assert_called_once()
+
+        with patch.dict("os.environ", {"S3_USER_STORAGE_KEY": "other-key"}):
+            OscDatasetStacGenerator(collection_id="third", **kwargs).dataset
+        self.assertEqual(mock_open_ds.call_count, 2)
+
+    @patch("deep_code.utils.dataset_stac_generator.open_dataset")
+    def test_spatial_extent_packed_coords_are_decoded(self, mock_open_ds):
+        import tempfile
+
+        import xarray as xr
+
+        ds = self._make_dataset()
+        encoding = {
+            "lon": {"dtype": "int16", "scale_factor": 0.5, "add_offset": 1.0},
+            "lat": {"dtype": "int16", "scale_factor": 0.25},
+        }
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = f"{tmp_dir}/packed.zarr"
+            ds.to_zarr(path, encoding=encoding, consolidated=True)
+            mock_open_ds.side_effect = lambda dataset_id, logger, open_params: (
+                xr.open_zarr(path, **open_params)
+            )
+            gen = OscDatasetStacGenerator(
+                dataset_id="packed.zarr",
+                collection_id="packed",
+                workflow_id="wf",
+                workflow_title="WF",
+                license_type="CC-BY-4.0",
+            )
+            extent = gen._get_spatial_extent()
+        self.assertEqual(extent.bboxes[0], [-10.0, -5.0, 10.0, 5.0])
+
     @patch("deep_code.utils.dataset_stac_generator.open_dataset")
     def test_collection_id_with_space_raises(self, mock_open_ds):
         mock_open_ds.return_value = self._make_dataset()
@@ -678,6 +773,41 @@ class TestOscDatasetStacGeneratorExtra(unittest.TestCase):
         extent = gen._get_spatial_extent()
         self.assertAlmostEqual(extent.bboxes[0][0], 0.0)
 
+    def test_spatial_extent_descending_coords(self):
+        ds = self._make_dataset()
+        ds = ds.isel(lat=slice(None, None, -1))
+        gen = self._make_generator(ds)
+        extent = gen._get_spatial_extent()
+        self.assertEqual(extent.bboxes[0], [-10.0, -5.0, 10.0, 5.0])
+
+    def test_spatial_extent_non_monotonic_coords(self):
+        import numpy as np
+        from xarray import Dataset
+
+        ds = Dataset(
+            coords={
+                "lon": ("lon", np.array([5.0, -10.0, 10.0])),
+                "lat": ("lat", np.array([-5.0, 5.0])),
+            }
+        )
+        gen = self._make_generator(ds)
+        extent = gen._get_spatial_extent()
+        self.assertEqual(extent.bboxes[0], [-10.0, -5.0, 10.0, 5.0])
+
+    def test_spatial_extent_non_index_coords(self):
+        import numpy as np
+        from xarray import Dataset
+
+        ds = Dataset(
+            coords={
+                "lon": ("x", np.array([-10.0, 0.0, 10.0])),
+                "lat": ("y", np.array([5.0, np.nan, -5.0])),
+            }
+        )
+        gen = self._make_generator(ds)
+        extent = gen._get_spatial_extent()
+        self.assertEqual(extent.bboxes[0], [-10.0, -5.0, 10.0, 5.0])
+
     @patch("deep_code.utils.dataset_stac_generator.open_dataset")
     def test_spatial_extent_unknown_coords_raises(self, mock_open_ds):
         ds = self._make_dataset("none")
@@ -686,6 +816,43 @@ class TestOscDatasetStacGeneratorExtra(unittest.TestCase):
         with self.assertRaisesRegex(ValueError, "recognized spatial coordinates"):
             gen._get_spatial_extent()
 
+    def test_temporal_extent_unsorted_time(self):
+        import numpy as np
+        from datetime import datetime
+        from xarray import Dataset
+
+        times = [datetime(2021, 6, 1), datetime(2020, 1, 1), datetime(2022, 3, 1)]
+        ds = Dataset(coords={"time": ("time", np.array(times, dtype="datetime64[ns]"))})
+        gen = self._make_generator(ds)
+        interval = gen._get_temporal_extent().intervals[0]
+        self.assertEqual(interval, [datetime(2020, 1, 1), datetime(2022, 3, 1)])
+
+    def test_extents_computed_in_single_pass(self):
+        from datetime import datetime
+
+        import dask
+        import numpy as np
+        from xarray import Dataset
+
+        times = [datetime(2021, 6, 1), datetime(2020, 1, 1), datetime(2022, 3, 1)]
+        ds = Dataset(
+            coords={
+                "lon": ("lon", np.array([5.0, -10.0, 10.0])),
+                "lat": ("lat", np.array([-5.0, 5.0])),
+                "time": ("time", np.array(times, dtype="datetime64[ns]")),
+            }
+        ).chunk()
+        gen = self._make_generator(ds)
+        with patch(
+            "deep_code.utils.dataset_stac_generator.dask.compute",
+            wraps=dask.compute,
+        ) as mock_compute:
+            bbox = gen._get_spatial_extent().bboxes[0]
+            interval = gen._get_temporal_extent().intervals[0]
+        mock_compute.assert_called_once()
+        self.assertEqual(bbox, [-10.0, -5.0, 10.0, 5.0])
+        self.assertEqual(interval, [datetime(2020, 1, 1), datetime(2022, 3, 1)])
+
     @patch("deep_code.utils.dataset_stac_generator.open_dataset")
     def test_temporal_extent_no_time_raises(self, mock_open_ds):
         ds = self._make_dataset("none")
@@ -700,6 +867,22 @@ class TestOscDatasetStacGeneratorExtra(unittest.TestCase):
         mock_open_ds.return_value = ds
         self.assertIsNone(OscDatasetStacGenerator._normalize_name(None))
 
+    def test_variables_metadata_excludes_coords(self):
+        ds = self._make_dataset()
+        ds["Air_Temp"] = ("lon", [1.0, 2.0, 3.0], {"long_name": "Air temperature"})
+        gen = self._make_generator(ds)
+        self.assertEqual(list(gen.variables_metadata), ["air-temp"])
+        self.assertEqual(
+            gen.variables_metadata["air-temp"]["description"], "Air temperature"
+        )
+
+    def test_normalize_name(self):
+        normalize = OscDatasetStacGenerator._normalize_name
+        self.assertEqual(normalize("sea-surface-temp"), "sea-surface-temp")
+        self.assertEqual(normalize("Sea Surface_Temp"), "sea-surface-temp")
+        self.assertEqual(normalize("NDVI"), "ndvi")
+        self.assertEqual(normalize("2m"), "2m")
+
     @patch("deep_code.utils.dataset_stac_generator.open_dataset")
     def test_build_collection_with_cf_params(self, mock_open_ds):
         ds = self._make_dataset()
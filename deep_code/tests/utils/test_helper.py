@@ -3,14 +3,26 @@
 # Permissions are hereby granted under the terms of the MIT License:
 # https://opensource.org/licenses/MIT.
 
+import json
 import os
+import tempfile
 import unittest
 from unittest.mock import MagicMock, call, patch
 
+import jsonschema
+import numpy as np
 import xarray
 import xarray as xr
 
-from deep_code.utils.helper import open_dataset, serialize
+from deep_code.utils.helper import (
+    _DATA_STORES,
+    DEFAULT_S3_CONFIG_KWARGS,
+    _get_data_store,
+    open_dataset,
+    serialize,
+    to_json_bytes,
+    write_records_ndjson,
+)
 
 
 def make_dummy_dataset():
@@ -21,6 +33,9 @@ def make_dummy_dataset():
 
 
 class TestOpenDataset(unittest.TestCase):
+    def setUp(self):
+        _DATA_STORES.clear()
+
     @patch("deep_code.utils.helper.logging.getLogger")
     @patch("deep_code.utils.helper.new_data_store")
     def test_success_public_store(self, mock_new_store, mock_get_logger):
@@ -36,13 +51,22 @@ class TestOpenDataset(unittest.TestCase):
 
         self.assertIs(result, dummy)
         mock_new_store.assert_called_once_with(
-            "s3", root="deep-esdl-public", storage_options={"anon": True}
+            "s3",
+            root="deep-esdl-public",
+            storage_options={
+                "anon": True,
+                "config_kwargs": DEFAULT_S3_CONFIG_KWARGS,
+            },
         )
         mock_logger.info.assert_any_call(
-            "Attempting to open dataset 'test-id' with configuration: Public store"
+            "Attempting to open dataset '%s' with configuration: %s",
+            "test-id",
+            "Public store",
         )
         mock_logger.info.assert_any_call(
-            "Successfully opened dataset 'test-id' with configuration: Public store"
+            "Successfully opened dataset '%s' with configuration: %s",
+            "test-id",
+            "Public store",
         )
 
     @patch("deep_code.utils.helper.new_data_store")
@@ -65,12 +89,20 @@ class TestOpenDataset(unittest.TestCase):
 
         # And new_data_store should have been called twice with exactly these params
         expected_calls = [
-            call("s3", root="deep-esdl-public", storage_options={"anon": True}),
+            call(
+                "s3",
+                root="deep-esdl-public",
+                storage_options={
+                    "anon": True,
+                    "config_kwargs": DEFAULT_S3_CONFIG_KWARGS,
+                },
+            ),
             call(
                 "s3",
                 root="mock-bucket",
                 storage_options={
                     "anon": False,
+                    "config_kwargs": DEFAULT_S3_CONFIG_KWARGS,
                     "key": "mock-key",
                     "secret": "mock-secret",
                 },
@@ -81,13 +113,19 @@ class TestOpenDataset(unittest.TestCase):
         # And the logger should have info about both attempts
         logger = mock_get_logger()
         logger.info.assert_any_call(
-            "Attempting to open dataset 'my-id' with configuration: Public store"
+            "Attempting to open dataset '%s' with configuration: %s",
+            "my-id",
+            "Public store",
         )
         logger.info.assert_any_call(
-            "Attempting to open dataset 'my-id' with configuration: Authenticated store"
+            "Attempting to open dataset '%s' with configuration: %s",
+            "my-id",
+            "Authenticated store",
         )
         logger.info.assert_any_call(
-            "Successfully opened dataset 'my-id' with configuration: Authenticated store"
+            "Successfully opened dataset '%s' with configuration: %s",
+            "my-id",
+            "Authenticated store",
         )
 
     @patch("deep_code.utils.helper.logging.getLogger")
@@ -107,6 +145,176 @@ class TestOpenDataset(unittest.TestCase):
         self.assertIn("Tried configurations: Public store, Authenticated store", msg)
         self.assertIn("Last error: fail", msg)
 
+    @patch("deep_code.utils.helper.new_data_store")
+    def test_open_params_passed_to_store(self, mock_new_store):
+        """Should pass open_params through to the store's open_data."""
+        dummy = make_dummy_dataset()
+        mock_store = MagicMock()
+        mock_store.open_data.return_value = dummy
+        mock_new_store.return_value = mock_store
+
+        result = open_dataset(
+            "test-id", logger=MagicMock(), open_params={"consolidated": True}
+        )
+
+        self.assertIs(result, dummy)
+        mock_store.open_data.assert_called_once_with("test-id", consolidated=True)
+
+    @patch("deep_code.utils.helper.new_data_store")
+    def test_missing_consolidated_metadata_retries_unconsolidated(self, mock_new_store):
+        """Should keep the other open_params when retrying unconsolidated."""
+        dummy = make_dummy_dataset()
+        mock_store = MagicMock()
+        mock_store.open_data.side_effect = [KeyError(".zmetadata"), dummy]
+        mock_new_store.return_value = mock_store
+
+        result = open_dataset(
+            "test-id",
+            logger=MagicMock(),
+            open_params={"consolidated": True, "mask_and_scale": False},
+        )
+
+        self.assertIs(result, dummy)
+        mock_store.open_data.assert_has_calls(
+            [
+                call("test-id", consolidated=True, mask_and_scale=False),
+                call("test-id", consolidated=False, mask_and_scale=False),
+            ]
+        )
+
+    @patch("deep_code.utils.helper.new_data_store")
+    def test_unconsolidated_retry_failure_is_raised(self, mock_new_store):
+        """Should not fall back to store defaults after the unconsolidated retry."""
+        mock_store = MagicMock()
+        mock_store.open_data.side_effect = [
+            KeyError(".zmetadata"),
+            OSError("read timed out"),
+        ]
+        mock_new_store.return_value = mock_store
+
+        with self.assertRaises(ValueError):
+            open_dataset(
+                "test-id",
+                logger=MagicMock(),
+                open_params={"consolidated": True},
+                storage_configs=[
+                    {
+                        "description": "Local store",
+                        "params": {
+                            "storage_type": "file",
+                            "root": ".",
+                            "storage_options": {},
+                        },
+                    }
+                ],
+            )
+
+        self.assertEqual(mock_store.open_data.call_count, 2)
+
+    @patch("deep_code.utils.helper.new_data_store")
+    def test_missing_metadata_without_consolidated_is_raised(self, mock_new_store):
+        """Should only retry unconsolidated if consolidated metadata was asked for."""
+        mock_store = MagicMock()
+        mock_store.open_data.side_effect = FileNotFoundError("no such key")
+        mock_new_store.return_value = mock_store
+
+        with self.assertRaises(ValueError):
+            open_dataset(
+                "test-id",
+                logger=MagicMock(),
+                open_params={"mask_and_scale": False},
+                storage_configs=[
+                    {
+                        "description": "Local store",
+                        "params": {
+                            "storage_type": "file",
+                            "root": ".",
+                            "storage_options": {},
+                        },
+                    }
+                ],
+            )
+
+        mock_store.open_data.assert_called_once_with("test-id", mask_and_scale=False)
+
+    @patch("deep_code.utils.helper.new_data_store")
+    def test_open_params_rejected_falls_back_to_defaults(self, mock_new_store):
+        """Should open with store defaults if open_params fail validation."""
+        dummy = make_dummy_dataset()
+        mock_store = MagicMock()
+        schema = mock_store.get_open_data_params_schema.return_value
+        schema.validate_instance.side_effect = jsonschema.ValidationError(
+            "Additional properties are not allowed"
+        )
+        mock_store.open_data.return_value = dummy
+        mock_new_store.return_value = mock_store
+
+        result = open_dataset(
+            "test-id", logger=MagicMock(), open_params={"chunked": True}
+        )
+
+        self.assertIs(result, dummy)
+        mock_store.get_open_data_params_schema.assert_called_once_with("test-id")
+        mock_store.open_data.assert_called_once_with("test-id")
+
+    @patch("deep_code.utils.helper.new_data_store")
+    def test_open_failure_does_not_fall_back_to_defaults(self, mock_new_store):
+        """Should not retry with store defaults if valid open_params fail."""
+        mock_store = MagicMock()
+        mock_store.open_data.side_effect = OSError("read timed out")
+        mock_new_store.return_value = mock_store
+
+        with self.assertRaises(ValueError):
+            open_dataset(
+                "test-id",
+                logger=MagicMock(),
+                open_params={"mask_and_scale": False},
+                storage_configs=[
+                    {
+                        "description": "Local store",
+                        "params": {
+                            "storage_type": "file",
+                            "root": ".",
+                            "storage_options": {},
+                        },
+                    }
+                ],
+            )
+
+        mock_store.open_data.assert_called_once_with("test-id", mask_and_scale=False)
+
+    @patch("deep_code.utils.helper.new_data_store")
+    def test_authenticated_store_skipped_without_bucket(self, mock_new_store):
+        """Should not try the authenticated store if no bucket is configured."""
+        mock_new_store.side_effect = Exception("fail")
+        env = {k: v for k, v in os.environ.items() if k != "S3_USER_STORAGE_BUCKET"}
+        with patch.dict(os.environ, env, clear=True):
+            with self.assertRaises(ValueError) as ctx:
+                open_dataset("test-id", logger=MagicMock())
+
+        mock_new_store.assert_called_once()
+        self.assertIn("Tried configurations: Public store.", str(ctx.exception))
+
+    @patch("deep_code.utils.helper.new_data_store")
+    def test_authenticated_store_uses_ambient_credentials(self, mock_new_store):
+        """Should try the user bucket without explicit keys if only it is set."""
+        mock_new_store.side_effect = Exception("fail")
+        env = {
+            k: v
+            for k, v in os.environ.items()
+            if k not in ("S3_USER_STORAGE_KEY", "S3_USER_STORAGE_SECRET")
+        }
+        env["S3_USER_STORAGE_BUCKET"] = "mock-bucket"
+        with patch.dict(os.environ, env, clear=True):
+            with self.assertRaises(ValueError):
+                open_dataset("test-id", logger=MagicMock())
+
+        mock_new_store.assert_called_with(
+            "s3",
+            root="mock-bucket",
+            storage_options={"anon": False, "config_kwargs": DEFAULT_S3_CONFIG_KWARGS},
+        )
+
     @patch("deep_code.utils.helper.logging.getLogger")
     @patch("deep_code.utils.helper.new_data_store")
     def test_with_custom_configs(self, mock_new_store, mock_get_logger):
@@ -130,10 +338,14 @@ class TestOpenDataset(unittest.TestCase):
         self.assertIs(result, dummy)
         mock_new_store.assert_called_once_with("file", root=".", storage_options={})
         mock_logger.info.assert_any_call(
-            "Attempting to open dataset 'test-id' with configuration: Local store"
+            "Attempting to open dataset '%s' with configuration: %s",
+            "test-id",
+            "Local store",
         )
         mock_logger.info.assert_any_call(
-            "Successfully opened dataset 'test-id' with configuration: Local store"
+            "Successfully opened dataset '%s' with configuration: %s",
+            "test-id",
+            "Local store",
         )
 
     @patch("deep_code.utils.helper.logging.getLogger")
@@ -151,12 +363,92 @@ class TestOpenDataset(unittest.TestCase):
 
         self.assertIs(result, dummy)
         custom_logger.info.assert_any_call(
-            "Attempting to open dataset 'test-id' with configuration: Public store"
+            "Attempting to open dataset '%s' with configuration: %s",
+            "test-id",
+            "Public store",
         )
         custom_logger.info.assert_any_call(
-            "Successfully opened dataset 'test-id' with configuration: Public store"
+            "Successfully opened dataset '%s' with configuration: %s",
+            "test-id",
+            "Public store",
         )
 
+    @patch("deep_code.utils.helper.new_data_store")
+    def test_store_is_reused_across_calls(self, mock_new_store):
+        """Should create the data store only once for identical configurations."""
+        mock_store = MagicMock()
+        mock_store.open_data.return_value = make_dummy_dataset()
+        mock_new_store.return_value = mock_store
+
+        open_dataset("first-id", logger=MagicMock())
+        open_dataset("second-id", logger=MagicMock())
+
+        mock_new_store.assert_called_once()
+        self.assertEqual(mock_store.open_data.call_count, 2)
+
+    @patch("deep_code.utils.helper.new_data_store")
+    def test_s3_config_without_bucket_is_skipped(self, mock_new_store):
+        """Should not attempt S3 configurations that have no bucket."""
+        dummy = make_dummy_dataset()
+        mock_store = MagicMock()
+        mock_store.open_data.return_value = dummy
+        mock_new_store.return_value = mock_store
+        configs = [
+            {
+                "description": "No bucket",
+                "params": {"storage_type": "s3", "root": None, "storage_options": {}},
+            },
+            {
+                "description": "Public store",
+                "params": {
+                    "storage_type": "s3",
+                    "root": "bucket",
+                    "storage_options": {"anon": True},
+                },
+            },
+        ]
+
+        result = open_dataset("test-id", storage_configs=configs, logger=MagicMock())
+
+        self.assertIs(result, dummy)
+        mock_new_store.assert_called_once_with(
+            "s3", root="bucket", storage_options={"anon": True}
+        )
+
+    @patch("deep_code.utils.helper.new_data_store")
+    def test_s3_config_with_empty_root_is_attempted(self, mock_new_store):
+        """Should try S3 configurations whose bucket is part of the data ID."""
+        dummy = make_dummy_dataset()
+        mock_store = MagicMock()
+        mock_store.open_data.return_value = dummy
+        mock_new_store.return_value = mock_store
+        configs = [
+            {
+                "description": "Bucket in data ID",
+                "params": {"storage_type": "s3", "root": "", "storage_options": {}},
+            }
+        ]
+
+        result = open_dataset(
+            "bucket/test-id", storage_configs=configs, logger=MagicMock()
+        )
+
+        self.assertIs(result, dummy)
+        mock_new_store.assert_called_once_with("s3", root="", storage_options={})
+
+    @patch("deep_code.utils.helper.new_data_store")
+    def test_store_cache_key_excludes_credentials(self, mock_new_store):
+        """Should key cached stores by a digest of the storage options."""
+        options = {"anon": False, "key": "my-key", "secret": "my-secret"}
+        store = _get_data_store("s3", "bucket", options)
+
+        self.assertIs(_get_data_store("s3", "bucket", dict(options)), store)
+        mock_new_store.assert_called_once_with(
+            "s3", root="bucket", storage_options=options
+        )
+        (key,) = _DATA_STORES
+        self.assertNotIn("my-secret", "".join(key))
+
 
 class TestSerialize(unittest.TestCase):
     def test_set_converted_to_list(self):
@@ -164,6 +456,13 @@ class TestSerialize(unittest.TestCase):
         self.assertIsInstance(result, list)
         self.assertCountEqual(result, [1, 2, 3])
 
+    def test_frozenset_and_set_subclass_converted_to_list(self):
+        class TagSet(set):
+            pass
+
+        self.assertCountEqual(serialize(frozenset({"a", "b"})), ["a", "b"])
+        self.assertCountEqual(serialize(TagSet({"c"})), ["c"])
+
     def test_object_with_dict_returns_dict(self):
         class Obj:
             def __init__(self):
@@ -176,3 +475,41 @@ class TestSerialize(unittest.TestCase):
     def test_unserializable_raises_type_error(self):
         with self.assertRaises(TypeError):
             serialize(42)
+
+
+class TestToJsonBytes(unittest.TestCase):
+    def test_matches_indented_json(self):
+        content = {"id": "ä", "bbox": [1.5, 2], "nested": {"ok": True}}
+        self.assertEqual(
+            to_json_bytes(content),
+            json.dumps(content, indent=2, ensure_ascii=False).encode("utf-8"),
+        )
+
+    def test_numpy_and_set_values(self):
+        result = json.loads(to_json_bytes({"min": np.float64(1.5), "ids": {"a"}}))
+        self.assertEqual(result, {"min": 1.5, "ids": ["a"]})
+
+    def test_unserializable_raises_type_error(self):
+        with self.assertRaises(TypeError):
+            to_json_bytes({"value": object()})
+
+
+class TestWriteRecordsNdjson(unittest.TestCase):
+    def test_writes_one_record_per_line(self):
+        class Record:
+            def to_dict(self):
+                return {"id": "wf", "tags": ["a"]}
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "records.ndjson")
+            count = write_records_ndjson(
+                path, [Record(), {"id": "exp", "value": np.float32(0.5)}]
+            )
+            with open(path, "rb") as f:
+                lines = f.read().splitlines()
+
+        self.assertEqual(count, 2)
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [{"id": "wf", "tags": ["a"]}, {"id": "exp", "value": 0.5}],
+        )
@@ -254,3 +254,39 @@ class TestExperimentAsOgcRecord(unittest.TestCase):
         self.assertEqual(experiment_record.conformsTo, [OGC_API_RECORD_SPEC])
         self.assertEqual(experiment_record.links[0]["rel"], "root")
         self.assertEqual(experiment_record.links[-1]["rel"], "self")
+
+    def test_static_links_are_not_shared_between_records(self):
+        def make(record_id):
+            return ExperimentAsOgcRecord(
+                id=record_id,
+                title="Test Experiment",
+                type="experiment",
+                jupyter_notebook_url="https://example.com/notebook.ipynb",
+                collection_id="test-collection",
+                properties=None,
+                links=[],
+            )
+
+        first, second = make("exp-1"), make("exp-2")
+        first.links[0]["title"] = "changed"
+        first.links[4]["application:platform_supports"].append("vscode")
+
+        self.assertEqual(second.links[0]["title"], "Open Science Catalog")
+        self.assertEqual(
+            make("exp-3").links[4]["application:platform_supports"],
+            ["jupyter-notebook"],
+        )
+        self.assertEqual(
+            [link["rel"] for link in second.links],
+            [
+                "root",
+                "parent",
+                "related",
+                "related",
+                "application-originating-platform",
+                "input",
+                "environment",
+                "self",
+            ],
+        )
+        self.assertEqual(second.links[2]["href"], "../../workflows/exp-2/record.json")
@@ -58,3 +58,20 @@ class TestOSCWorkflowOGCApiRecordGenerator(unittest.TestCase):
         self.assertEqual(record_properties.type, "workflow")
         self.assertTrue("created" in record_properties.__dict__)
         self.assertTrue("updated" in record_properties.__dict__)
+        # The caller's dict is left unchanged
+        self.assertEqual(properties["themes"], ["theme1"])
+        self.assertNotIn("contacts", properties)
+        self.assertNotIn("type", properties)
+
+    def test_build_record_properties_share_timestamp(self):
+        generator = OSCWorkflowOGCApiRecordGenerator()
+
+        first = generator.build_record_properties(
+            {"title": "A", "description": "a"}, []
+        )
+        second = generator.build_record_properties(
+            {"title": "B", "description": "b"}, []
+        )
+
+        self.assertEqual(first.created, first.updated)
+        self.assertEqual(first.created, second.created)
@@ -3,7 +3,6 @@
 # Permissions are hereby granted under the terms of the MIT License:
 # https://opensource.org/licenses/MIT.
 import copy
-import json
 import logging
 import os
 from datetime import datetime
@@ -24,6 +23,7 @@ from deep_code.constants import (
 )
 from deep_code.utils.dataset_stac_generator import OscDatasetStacGenerator
 from deep_code.utils.github_automation import GitHubAutomation
+from deep_code.utils.helper import to_json_bytes
 from deep_code.utils.ogc_api_record import (
     ExperimentAsOgcRecord,
     LinksBuilder,
@@ -42,7 +42,7 @@ class GitHubPublisher:
       - Common GitHub automation steps (fork, clone, branch, file commit, pull request)
     """
 
-    def __init__(self, repo_name: str = OSC_REPO_NAME):
+    def __init__(self, repo_name: str = OSC_REPO_NAME, keep_clone: bool = False):
         with fsspec.open(".gitaccess", "r") as file:
             git_config = yaml.safe_load(file) or {}
         self.github_username = git_config.get("github-username")
@@ -51,7 +51,11 @@ class GitHubPublisher:
             raise ValueError("GitHub credentials are missing in the `.gitaccess` file.")
 
         self.github_automation = GitHubAutomation(
-            self.github_username, self.github_token, OSC_REPO_OWNER, repo_name
+            self.github_username,
+            self.github_token,
+            OSC_REPO_OWNER,
+            repo_name,
+            keep_clone=keep_clone,
         )
         self.github_automation.fork_repository()
         self.github_automation.clone_sync_repository()
@@ -67,6 +71,7 @@ class GitHubPublisher:
         sync_strategy: Literal[
             "ff", "rebase", "merge"
         ] = "merge",  # 'ff' | 'rebase' | 'merge'
+        use_git: bool = True,
     ) -> str:
         """Publish multiple files to a new branch and open a PR.
 
@@ -81,6 +86,10 @@ class GitHubPublisher:
             - "ff":     Fast-forward only (no merge commits; fails if FF not possible).
             - "rebase": Rebase local changes onto the updated base branch.
             - "merge":  Create a merge commit (default).
+            use_git: If True (default), commit and push from the local clone.
+                If False, sync the fork, create the branch and commit the files
+                directly on GitHub via the REST API, without local git
+                operations; sync_strategy is then not used.
 
         Returns:
             URL of the created pull request.
@@ -96,22 +105,34 @@ class GitHubPublisher:
             )
 
         try:
-            # Ensure local clone and remotes are ready
-            self.github_automation.clone_sync_repository()
-            # Sync fork with upstream before creating the branch/committing
-            self.github_automation.sync_fork_with_upstream(
-                base_branch=base_branch, strategy=sync_strategy
-            )
+            if use_git:
+                # Ensure local clone and remotes are ready
+                self.github_automation.clone_sync_repository(base_branch=base_branch)
+                # Sync fork with upstream before creating the branch/committing
+                self.github_automation.sync_fork_with_upstream(
+                    base_branch=base_branch, strategy=sync_strategy
+                )
 
-            self.github_automation.create_branch(branch_name, from_branch=base_branch)
+                self.github_automation.create_branch(
+                    branch_name, from_branch=base_branch
+                )
 
-            # Add each file to the branch
-            for file_path, content in file_dict.items():
-                logger.info(f"Adding {file_path} to {branch_name}")
-                self.github_automation.add_file(file_path, content)
+                # Add all files to the branch, staging them in one go
+                for file_path in file_dict:
+                    logger.info(f"Adding {file_path} to {branch_name}")
+                self.github_automation.add_files(file_dict)
 
-            # Commit and push
-            self.github_automation.commit_and_push(branch_name, commit_message)
+                # Commit and push
+                self.github_automation.commit_and_push(branch_name, commit_message)
+            else:
+                # Sync, branch and commit on GitHub; no local git operations
+                self.github_automation.sync_fork_via_api(base_branch)
+                for file_path in file_dict:
+                    logger.info(f"Adding {file_path} to {branch_name}")
+                # All files go into a single commit on the new branch
+                self.github_automation.commit_files_via_api(
+                    branch_name, file_dict, commit_message, base_branch=base_branch
+                )
 
             # Create pull request
             pr_url = self.github_automation.create_pull_request(
@@ -135,6 +156,7 @@ class Publisher:
         dataset_config_path: str | None = None,
         workflow_config_path: str | None = None,
         environment: str = "production",
+        keep_clone: bool = False,
     ):
         self.environment = environment
         # Determine repo name based on environment
@@ -146,7 +168,9 @@ class Publisher:
             repo_name = "open-science-catalog-metadata-testing"
 
         # Composition
-        self.gh_publisher = GitHubPublisher(repo_name=repo_name)
+        # keep_clone: reuse the local clone of the metadata repository in the
+        # next run instead of removing it after publishing
+        self.gh_publisher = GitHubPublisher(repo_name=repo_name, keep_clone=keep_clone)
         self.collection_id = ""
         self.workflow_title = ""
 
@@ -591,13 +615,15 @@ class Publisher:
         """Write STAC catalog and item JSON files to S3 via fsspec/s3fs."""
         for s3_path, content in file_dict.items():
             logger.info(f"Writing STAC file to {s3_path}")
-            with fsspec.open(s3_path, "w", **storage_options) as f:
-                json.dump(content, f, indent=2)
+            # Serialize up front and upload the bytes in a single write
+            with fsspec.open(s3_path, "wb", **storage_options) as f:
+                f.write(to_json_bytes(content))
 
     def publish(
         self,
         write_to_file: bool = False,
         mode: Literal["all", "dataset", "workflow"] = "all",
+        use_git: bool = True,
     ) -> dict[str, Any] | str:
         """
         Publish both dataset and workflow/experiment in a single PR.
@@ -608,6 +634,8 @@ class Publisher:
                   - "dataset": only dataset collection & related catalogs
                   - "workflow": only workflow records
                   - "all": both
+            use_git: If False, commit the files via the GitHub REST API instead
+                of pushing from the local clone (see ``GitHubPublisher.publish_files``).
         Returns:
             dict[str, Any] when write_to_file=True (the files written),
             or str when write_to_file=False (the PR URL).
@@ -673,6 +701,7 @@ class Publisher:
             commit_message=commit_message,
             pr_title=pr_title,
             pr_body=pr_body,
+            use_git=use_git,
         )
         logger.info(f"Pull request created: {pr_url}")
         return pr_url
@@ -6,21 +6,81 @@
 import json
 import logging
 from datetime import datetime, timezone
+from functools import cached_property, lru_cache
 
-import pandas as pd
+import dask
+import numpy as np
+import xarray as xr
 from pystac import Catalog, Collection, Extent, Item, Asset, Link, SpatialExtent, TemporalExtent
 
 from deep_code.constants import (
+    BASE_URL_OSC,
     CONTACTS_SCHEMA_URI,
     OSC_SCHEMA_URI,
     OSC_THEME_SCHEME,
     THEMES_SCHEMA_URI,
     ZARR_MEDIA_TYPE,
 )
-from deep_code.utils.helper import open_dataset
+from deep_code.utils.helper import open_dataset, s3_credentials_key
 from deep_code.utils.ogc_api_record import Theme, ThemeConcept
 from deep_code.utils.osc_extension import OscExtension
 
+# Supported spatial coordinate pairs, in order of preference: regular gridding
+# ('lon'/'lat' or 'longitude'/'latitude') and irregular gridding ('x'/'y')
+_SPATIAL_COORD_NAMES = (("lon", "lat"), ("longitude", "latitude"), ("x", "y"))
+
+# Open parameters for metadata extraction: read the consolidated Zarr metadata
+# (a single request) instead of fetching every array's metadata separately.
+# Masking and scaling stay enabled: the extents are computed from the same
+# dataset, and packed or fill-valued coordinates must be decoded for them.
+_METADATA_OPEN_PARAMS = {"consolidated": True}
+
+# Normalized IDs of grid-mapping variables that are not published as variables
+_NON_VARIABLE_IDS = frozenset(("crs", "spatial-ref"))
+
+# Word separators replaced by hyphens when normalizing names
+_NAME_SEPARATORS = str.maketrans({" ": "-", "_": "-"})
+
+# Self-href templates for catalog entries hosted on the OSC website
+_VARIABLE_SELF_HREF = BASE_URL_OSC + "/variables/{}/catalog.json"
+_PRODUCT_SELF_HREF = BASE_URL_OSC + "/products/{}/collection.json"
+_PROJECT_SELF_HREF = BASE_URL_OSC + "/projects/{}/collection.json"
+
+# Links shared by every generated catalog; add clones, never the templates
+_ROOT_LINK = Link(
+    rel="root",
+    target="../../catalog.json",
+    media_type="application/json",
+    title="Open Science Catalog",
+)
+_VARIABLES_PARENT_LINK = Link(
+    rel="parent",
+    target="../catalog.json",
+    media_type="application/json",
+    title="Variables",
+)
+_PRODUCTS_PARENT_LINK = Link(
+    rel="parent",
+    target="../catalog.json",
+    media_type="application/json",
+    title="Products",
+)
+
+
+@lru_cache(maxsize=32)
+def _open_metadata_dataset(dataset_id: str, credentials_key: str) -> xr.Dataset:
+    """Open a dataset for metadata extraction, reusing it across generators.
+
+    Opening a remote Zarr costs several S3 round trips, so repeated builds for
+    the same dataset within a process share one lazily loaded dataset. The
+    credentials key is only part of the cache key; see ``s3_credentials_key``.
+    """
+    return open_dataset(
+        dataset_id=dataset_id,
+        logger=logging.getLogger(__name__),
+        open_params=_METADATA_OPEN_PARAMS,
+    )
+
 
 class OscDatasetStacGenerator:
     """Generates OSC STAC Collections for a product from Zarr datasets.
@@ -81,55 +141,112 @@ class OscDatasetStacGenerator:
         self.visualisation_link = visualisation_link
         self.description = description
         self.logger = logging.getLogger(__name__)
-        self.dataset = open_dataset(dataset_id=dataset_id, logger=self.logger)
-        self.variables_metadata = self.get_variables_metadata()
+        # One timestamp per generator run, so all objects built by it agree
+        self._now_iso = datetime.now(timezone.utc).isoformat()
+
+    @cached_property
+    def dataset(self) -> xr.Dataset:
+        """The dataset, opened on first access rather than on construction."""
+        return _open_metadata_dataset(self.dataset_id, s3_credentials_key())
+
+    def _get_coord_endpoints(self, name: str) -> tuple | None:
+        """Return ``(min, max)`` of a 1-D coordinate without a reduction.
+
+        The bounds of a monotonic coordinate are simply its first and last
+        values. For index coordinates they are read from the in-memory index.
+        Other 1-D coordinates that are not dask-backed are read once and
+        checked for monotonicity; if they are not monotonic, their bounds are
+        taken from the values already read. Returns None if a full reduction
+        is required.
+        """
+        index = self.dataset.indexes.get(name)
+        if index is not None:
+            if len(index) == 0:
+                return None
+            if not (index.is_monotonic_increasing or index.is_monotonic_decreasing):
+                return None
+            first, last = index[0], index[-1]
+            return (first, last) if first <= last else (last, first)
+        coord = self.dataset[name]
+        if coord.ndim != 1 or coord.size == 0 or coord.chunks is not None:
+            return None
+        values = coord.values
+        first, last = values[0], values[-1]
+        if first > last:
+            first, last = last, first
+            values = values[::-1]
+        if np.all(values[1:] >= values[:-1]):
+            return first, last
+        return np.nanmin(values), np.nanmax(values)
+
+    def _find_spatial_coord_names(self) -> tuple[str, str] | None:
+        """Return the first supported spatial coordinate pair in the dataset."""
+        for x_name, y_name in _SPATIAL_COORD_NAMES:
+            if {x_name, y_name}.issubset(self.dataset.coords):
+                return x_name, y_name
+        return None
+
+    @cached_property
+    def _extent_bounds(self) -> dict[str, tuple]:
+        """``(min, max)`` of the spatial and temporal extent coordinates.
+
+        Bounds of 1-D index and non-dask coordinates are found without a
+        reduction (see ``_get_coord_endpoints``). All remaining min/max
+        reductions are evaluated in a single ``dask.compute`` call, so that
+        the chunk reads for every coordinate share one scheduler pass and
+        connection pool instead of being loaded one after the other.
+        """
+        names = list(self._find_spatial_coord_names() or ())
+        if "time" in self.dataset.coords:
+            names.append("time")
+        bounds = {}
+        pending = []
+        for name in names:
+            endpoints = self._get_coord_endpoints(name)
+            if endpoints is None:
+                pending.append(name)
+            else:
+                bounds[name] = endpoints
+        if pending:
+            values = dask.compute(
+                *(
+                    reduction.data
+                    for name in pending
+                    for reduction in (
+                        self.dataset[name].min(),
+                        self.dataset[name].max(),
+                    )
+                ),
+                scheduler="threads",
+            )
+            for i, name in enumerate(pending):
+                bounds[name] = (values[2 * i][()], values[2 * i + 1][()])
+        return bounds
 
     def _get_spatial_extent(self) -> SpatialExtent:
         """Extract spatial extent from the dataset."""
-        if {"lon", "lat"}.issubset(self.dataset.coords):
-            # For regular gridding
-            lon_min, lon_max = (
-                float(self.dataset.lon.min()),
-                float(self.dataset.lon.max()),
-            )
-            lat_min, lat_max = (
-                float(self.dataset.lat.min()),
-                float(self.dataset.lat.max()),
-            )
-            return SpatialExtent([[lon_min, lat_min, lon_max, lat_max]])
-        elif {"longitude", "latitude"}.issubset(self.dataset.coords):
-            # For regular gridding with 'longitude' and 'latitude'
-            lon_min, lon_max = (
-                float(self.dataset.longitude.min()),
-                float(self.dataset.longitude.max()),
-            )
-            lat_min, lat_max = (
-                float(self.dataset.latitude.min()),
-                float(self.dataset.latitude.max()),
-            )
-            return SpatialExtent([[lon_min, lat_min, lon_max, lat_max]])
-        elif {"x", "y"}.issubset(self.dataset.coords):
-            # For irregular gridding
-            x_min, x_max = (float(self.dataset.x.min()), float(self.dataset.x.max()))
-            y_min, y_max = (float(self.dataset.y.min()), float(self.dataset.y.max()))
-            return SpatialExtent([[x_min, y_min, x_max, y_max]])
-        else:
+        coord_names = self._find_spatial_coord_names()
+        if coord_names is None:
             raise ValueError(
                 "Dataset does not have recognized spatial coordinates "
                 "('lon', 'lat' or 'x', 'y')."
             )
+        x_name, y_name = coord_names
+        (x_min, x_max), (y_min, y_max) = (
+            self._extent_bounds[x_name],
+            self._extent_bounds[y_name],
+        )
+        return SpatialExtent([[float(x_min), float(y_min), float(x_max), float(y_max)]])
 
     def _get_temporal_extent(self) -> TemporalExtent:
         """Extract temporal extent from the dataset."""
         if "time" in self.dataset.coords:
             try:
-                # Convert the time bounds to datetime objects
-                time_min = pd.to_datetime(
-                    self.dataset.time.min().values
-                ).to_pydatetime()
-                time_max = pd.to_datetime(
-                    self.dataset.time.max().values
-                ).to_pydatetime()
+                # Convert the datetime64 bounds to (naive) datetime objects
+                time_min, time_max = (
+                    np.datetime64(bound, "us").item()
+                    for bound in self._extent_bounds["time"]
+                )
                 return TemporalExtent([[time_min, time_max]])
             except Exception as e:
                 raise ValueError(f"Failed to parse temporal extent: {e}")
@@ -138,9 +255,12 @@ class OscDatasetStacGenerator:
 
     @staticmethod
     def _normalize_name(name: str | None) -> str | None:
-        if name:
-            return name.replace(" ", "-").replace("_", "-").lower()
-        return None
+        if not name:
+            return None
+        # Most variable names are already normalized
+        if name.islower() and " " not in name and "_" not in name:
+            return name
+        return name.translate(_NAME_SEPARATORS).lower()
 
     def _get_general_metadata(self) -> dict:
         return {
@@ -151,35 +271,51 @@ class OscDatasetStacGenerator:
             )
         }
 
-    def extract_metadata_for_variable(self, variable_data) -> dict:
-        """Extract metadata for a single variable."""
-        long_name = variable_data.attrs.get("long_name")
-        standard_name = variable_data.attrs.get("standard_name")
-        variable_id = standard_name or variable_data.name
-        description = variable_data.attrs.get("description", long_name)
-        gcmd_keyword_url = variable_data.attrs.get("gcmd_keyword_url")
+    def extract_metadata_for_variable(
+        self, variable_data, name: str | None = None
+    ) -> dict:
+        """Extract metadata for a single variable.
+
+        Args:
+            variable_data: The variable, either a ``DataArray`` or a ``Variable``.
+            name: Name of the variable. Required for a ``Variable``, which
+                unlike a ``DataArray`` carries no name of its own.
+        """
+        attrs = variable_data.attrs
+        long_name = attrs.get("long_name")
+        variable_id = attrs.get("standard_name") or name or variable_data.name
         return {
             "variable_id": self._normalize_name(variable_id),
-            "description": description,
-            "gcmd_keyword_url": gcmd_keyword_url,
+            "description": attrs.get("description", long_name),
+            "gcmd_keyword_url": attrs.get("gcmd_keyword_url"),
         }
 
     def get_variable_ids(self) -> list[str]:
         """Get variable IDs for all variables in the dataset."""
-        variable_ids = list(self.variables_metadata.keys())
         #  Remove 'crs' and 'spatial_ref' from the list if they exist, note that
         #  spatial_ref will be normalized to spatial-ref in variable_ids and skipped.
         return [
-            var_id for var_id in variable_ids if var_id not in ["crs", "spatial-ref"]
+            var_id
+            for var_id in self.variables_metadata
+            if var_id not in _NON_VARIABLE_IDS
         ]
 
     def get_variables_metadata(self) -> dict[str, dict]:
         """Extract metadata for all variables in the dataset."""
-        variables_metadata = {}
-        for var_name, variable in self.dataset.data_vars.items():
-            var_metadata = self.extract_metadata_for_variable(variable)
-            variables_metadata[var_metadata.get("variable_id")] = var_metadata
-        return variables_metadata
+        # Iterate the raw variables rather than data_vars, which wraps each
+        # variable into a new DataArray on access
+        coord_names = set(self.dataset.coords)
+        all_metadata = (
+            self.extract_metadata_for_variable(variable, name)
+            for name, variable in self.dataset.variables.items()
+            if name not in coord_names
+        )
+        return {metadata["variable_id"]: metadata for metadata in all_metadata}
+
+    @cached_property
+    def variables_metadata(self) -> dict[str, dict]:
+        """Metadata for all variables, extracted on first access."""
+        return self.get_variables_metadata()
 
     def _add_gcmd_link_to_var_catalog(
         self, var_catalog: Catalog, var_metadata: dict
@@ -208,8 +344,9 @@ class OscDatasetStacGenerator:
             )
         )
         self.logger.info(
-            f'Added GCMD link for {var_metadata.get("variable_id")} '
-            f"catalog {gcmd_keyword_url}."
+            "Added GCMD link for %s catalog %s.",
+            var_metadata.get("variable_id"),
+            gcmd_keyword_url,
         )
 
     def build_variable_catalog(self, var_metadata) -> Catalog:
@@ -228,7 +365,7 @@ class OscDatasetStacGenerator:
             }
         ]
 
-        now_iso = datetime.now(timezone.utc).isoformat()
+        now_iso = self._now_iso
 
         # Create a PySTAC Catalog object
         var_catalog = Catalog(
@@ -241,22 +378,16 @@ class OscDatasetStacGenerator:
         )
 
         var_catalog.stac_version = "1.0.0"
-        var_catalog.extra_fields["updated"] = now_iso
+        extra_fields = var_catalog.extra_fields
+        extra_fields["updated"] = now_iso
         var_catalog.keywords = []
 
         # Add the 'themes' block (from your example JSON)
-        var_catalog.extra_fields["themes"] = themes
+        extra_fields["themes"] = themes
 
         var_catalog.remove_links("root")
         # Add relevant links
-        var_catalog.add_link(
-            Link(
-                rel="root",
-                target="../../catalog.json",
-                media_type="application/json",
-                title="Open Science Catalog",
-            )
-        )
+        var_catalog.add_link(_ROOT_LINK.clone())
 
         # 'child' link: points to the product (or one of its collections) using this variable
         var_catalog.add_link(
@@ -269,23 +400,13 @@ class OscDatasetStacGenerator:
         )
 
         # 'parent' link: back up to the variables overview
-        var_catalog.add_link(
-            Link(
-                rel="parent",
-                target="../catalog.json",
-                media_type="application/json",
-                title="Variables",
-            )
-        )
+        var_catalog.add_link(_VARIABLES_PARENT_LINK.clone())
         # Add gcmd link for the variable definition
         self._add_gcmd_link_to_var_catalog(var_catalog, var_metadata)
 
         self.add_themes_as_related_links_var_catalog(var_catalog)
 
-        self_href = (
-            f"https://esa-earthcode.github.io/open-science-catalog-metadata/variables"
-            f"/{var_id}/catalog.json"
-        )
+        self_href = _VARIABLE_SELF_HREF.format(var_id)
         # 'self' link: the direct URL where this JSON is hosted
         var_catalog.set_self_href(self_href)
 
@@ -356,11 +477,8 @@ class OscDatasetStacGenerator:
         Returns:
             A plain dict representing the STAC Collection.
         """
-        now_iso = datetime.now(timezone.utc).isoformat()
-        self_href = (
-            "https://esa-earthcode.github.io/open-science-catalog-metadata"
-            f"/projects/{self.osc_project}/collection.json"
-        )
+        now_iso = self._now_iso
+        self_href = _PROJECT_SELF_HREF.format(self.osc_project)
         links = [
             {
                 "rel": "self",
@@ -476,7 +594,7 @@ class OscDatasetStacGenerator:
         """Append child and theme links to an existing variable catalog."""
         with open(var_file_path, encoding="utf-8") as f:
             data = json.load(f)
-        data["updated"] = datetime.now(timezone.utc).isoformat()
+        data["updated"] = self._now_iso
         links = data.setdefault("links", [])
         self._append_link_if_absent(
             links,
@@ -537,7 +655,7 @@ class OscDatasetStacGenerator:
         Returns:
             A :class:`pystac.Item` ready to be serialised to S3.
         """
-        self.logger.info(f"Building STAC Item for collection '{self.collection_id}'.")
+        self.logger.info("Building STAC Item for collection '%s'.", self.collection_id)
         spatial_extent = self._get_spatial_extent()
         temporal_extent = self._get_temporal_extent()
         general_metadata = self._get_general_metadata()
@@ -562,14 +680,11 @@ class OscDatasetStacGenerator:
         if end_dt is not None and end_dt.tzinfo is None:
             end_dt = end_dt.replace(tzinfo=timezone.utc)
 
-        now_iso = datetime.now(timezone.utc).isoformat()
+        now_iso = self._now_iso
         root = stac_catalog_s3_root.rstrip("/")
         catalog_href = f"{root}/catalog.json"
         item_href = f"{root}/{self.collection_id}/item.json"
-        osc_collection_href = (
-            "https://esa-earthcode.github.io/open-science-catalog-metadata"
-            f"/products/{self.collection_id}/collection.json"
-        )
+        osc_collection_href = _PRODUCT_SELF_HREF.format(self.collection_id)
 
         item = Item(
             id=self.collection_id,
@@ -606,7 +721,7 @@ class OscDatasetStacGenerator:
             title="Consolidated Zarr Metadata",
             roles=["metadata"],
         ))
-        self.logger.info(f"STAC Item built: {item_href}")
+        self.logger.info("STAC Item built: %s", item_href)
         return item
 
     def build_zarr_stac_catalog_file_dict(
@@ -629,8 +744,9 @@ class OscDatasetStacGenerator:
             ``{s3_path: content_dict}`` for every file to be written to S3.
         """
         self.logger.info(
-            f"Building STAC Catalog file dict for collection '{self.collection_id}' "
-            f"at root '{stac_catalog_s3_root}'."
+            "Building STAC Catalog file dict for collection '%s' at root '%s'.",
+            self.collection_id,
+            stac_catalog_s3_root,
         )
         root = stac_catalog_s3_root.rstrip("/")
         catalog_href = f"{root}/catalog.json"
@@ -651,15 +767,31 @@ class OscDatasetStacGenerator:
         ))
 
         item_href = f"{root}/{self.collection_id}/item.json"
-        self.logger.info(f"STAC Catalog file dict ready: {catalog_href}, {item_href}")
+        self.logger.info(
+            "STAC Catalog file dict ready: %s, %s", catalog_href, item_href
+        )
         return {
             catalog_href: catalog.to_dict(transform_hrefs=False),
             item_href: item.to_dict(transform_hrefs=False),
         }
 
-    def build_dataset_stac_collection(self, mode: str, stac_catalog_s3_root: str | None = None) -> Collection:
+    def build_dataset_stac_collection(
+        self,
+        mode: str,
+        stac_catalog_s3_root: str | None = None,
+        validate: bool = True,
+    ) -> Collection:
         """Build an OSC STAC Collection for the dataset.
 
+        Args:
+            mode: Publishing mode; in ``"all"`` mode the collection also links
+                the experiment record.
+            stac_catalog_s3_root: Optional S3 root of a STAC catalog for the
+                dataset, linked from the collection.
+            validate: Whether to check the required OSC extension fields.
+                Callers that have already validated the generator's settings
+                may skip it.
+
         Returns:
             A pystac.Collection object.
         """
@@ -680,11 +812,17 @@ class OscDatasetStacGenerator:
 
         # Add OSC extension metadata
         osc_extension = OscExtension.add_to(collection)
-        # osc_project and osc_type are fixed constant values
-        osc_extension.osc_project = self.osc_project
-        osc_extension.osc_type = "product"
-        osc_extension.osc_status = self.osc_status
-        osc_extension.osc_region = self.osc_region
+        extra_fields = collection.extra_fields
+        # Plain string fields are set in one go (osc:type is a fixed value);
+        # list fields go through the extension's validating setters
+        extra_fields.update(
+            {
+                "osc:project": self.osc_project,
+                "osc:type": "product",
+                "osc:status": self.osc_status,
+                "osc:region": self.osc_region,
+            }
+        )
         osc_extension.osc_variables = variables
         osc_extension.osc_missions = self.osc_missions
         if self.cf_params:
@@ -693,21 +831,12 @@ class OscDatasetStacGenerator:
             osc_extension.cf_parameter = [{"name": self.collection_id}]
 
         # Add creation and update timestamps for the collection
-        now_iso = datetime.now(timezone.utc).isoformat()
-        collection.extra_fields["created"] = now_iso
-        collection.extra_fields["updated"] = now_iso
+        extra_fields["created"] = extra_fields["updated"] = self._now_iso
         collection.title = self.collection_id
 
         # Remove any existing root link and re-add it properly
         collection.remove_links("root")
-        collection.add_link(
-            Link(
-                rel="root",
-                target="../../catalog.json",
-                media_type="application/json",
-                title="Open Science Catalog",
-            )
-        )
+        collection.add_link(_ROOT_LINK.clone())
         if self.documentation_link:
             collection.add_link(
                 Link(rel="via", target=self.documentation_link, title="Documentation")
@@ -716,14 +845,7 @@ class OscDatasetStacGenerator:
             collection.add_link(
                 Link(rel="visualisation", target=self.visualisation_link, title="Dataset visualisation")
             )
-        collection.add_link(
-            Link(
-                rel="parent",
-                target="../catalog.json",
-                media_type="application/json",
-                title="Products",
-            )
-        )
+        collection.add_link(_PRODUCTS_PARENT_LINK.clone())
 
         # Add variables ref
         for var in variables:
@@ -736,16 +858,13 @@ class OscDatasetStacGenerator:
                 )
             )
 
-        self_href = (
-            "https://esa-earthcode.github.io/"
-            f"open-science-catalog-metadata/products/{self.collection_id}/collection.json"
-        )
+        self_href = _PRODUCT_SELF_HREF.format(self.collection_id)
         collection.set_self_href(self_href)
 
         # align with themes instead of osc:themes
         if self.osc_themes:
             theme_obj = self.build_theme(self.osc_themes)
-            collection.extra_fields["themes"] = [theme_obj]
+            extra_fields["themes"] = [theme_obj]
 
             for theme in self.osc_themes:
                 formatted_theme = self.format_string(theme)
@@ -804,9 +923,10 @@ class OscDatasetStacGenerator:
             ))
 
         # Validate OSC extension fields
-        try:
-            osc_extension.validate_extension()
-        except ValueError as e:
-            raise ValueError(f"OSC Extension validation failed: {e}")
+        if validate:
+            try:
+                osc_extension.validate_extension()
+            except ValueError as e:
+                raise ValueError(f"OSC Extension validation failed: {e}")
 
         return collection
@@ -5,17 +5,68 @@
 
 from __future__ import annotations
 
-import json
+import asyncio
+import base64
 import logging
 import os
 import shutil
+import stat
 import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import Any, Awaitable, Iterable, TypeVar
 
 import requests
-
-from deep_code.utils.helper import serialize
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from deep_code.utils.helper import to_json_bytes
+
+GITHUB_API_URL = "https://api.github.com"
+GITHUB_GRAPHQL_URL = f"{GITHUB_API_URL}/graphql"
+
+# Head commit of a branch together with its tree, which the Git Data API needs
+# as parent and base tree of a new commit (two REST requests otherwise)
+_BRANCH_HEAD_QUERY = """
+query($owner: String!, $name: String!, $ref: String!) {
+  repository(owner: $owner, name: $name) {
+    ref(qualifiedName: $ref) {
+      target {
+        oid
+        ... on Commit { tree { oid } }
+      }
+    }
+  }
+}
+"""
+
+# Transient GitHub API failures worth retrying (rate limits and gateway errors).
+# Only idempotent methods are retried: a POST that failed with a gateway error
+# may still have taken effect (e.g. created the pull request or ref), and its
+# retry would then fail with 422 although the request succeeded.
+_API_RETRY = Retry(
+    total=5,
+    backoff_factor=0.5,
+    status_forcelist=(429, 502, 503, 504),
+    respect_retry_after_header=True,
+)
+
+# The fork request is the exception: GitHub answers a repeated fork request
+# with the existing fork, so it is safe to retry.
+_FORK_RETRY = _API_RETRY.new(allowed_methods=frozenset({"POST"}))
+
+# Pooled connections per host, sized to match the blob-upload workers in
+# commit_files_via_api
+_API_POOL_MAXSIZE = 8
+
+
+def _remove_readonly(func, path, _exc) -> None:
+    """Error handler for ``shutil.rmtree`` that clears the read-only flag
+    git sets on object files (which blocks their deletion on Windows) and
+    retries the failed operation."""
+    os.chmod(path, stat.S_IWRITE)
+    func(path)
 
 
 class GitHubAutomation:
@@ -27,6 +78,9 @@ class GitHubAutomation:
         repo_owner: Owner of the repository to fork.
         repo_name: Name of the repository to fork.
         local_clone_dir: Optional path to use for local clone (defaults to ~/temp_repo).
+        keep_clone: If True, ``clean_up`` keeps the local clone so that the next
+            run fetches into it instead of cloning again. Note that the clone's
+            git config contains the token in the origin URL.
     """
 
     def __init__(
@@ -36,11 +90,13 @@ class GitHubAutomation:
         repo_owner: str,
         repo_name: str,
         local_clone_dir: str | None = None,
+        keep_clone: bool = False,
     ):
         self.username = username
         self.token = token
         self.repo_owner = repo_owner
         self.repo_name = repo_name
+        self.keep_clone = keep_clone
 
         self.base_repo_url = f"https://github.com/{repo_owner}/{repo_name}.git"
         # Tokenized origin URL for pushes to the fork
@@ -53,6 +109,41 @@ class GitHubAutomation:
             else local_clone_dir
         )
 
+        # Environment for git subprocesses: never block on a credential
+        # prompt, skip optional index lock/refresh work in read commands, and
+        # abort transfers that stall below 1 KiB/s for a minute
+        self._git_env = {
+            **os.environ,
+            "GIT_TERMINAL_PROMPT": "0",
+            "GIT_OPTIONAL_LOCKS": "0",
+            "GIT_HTTP_LOW_SPEED_LIMIT": "1000",
+            "GIT_HTTP_LOW_SPEED_TIME": "60",
+        }
+
+        # One session for all API calls, so the TLS connection to the GitHub
+        # API is reused and transient errors are retried
+        self.session = requests.Session()
+        self.session.headers.update(
+            {
+                "Authorization": f"token {token}",
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28",
+            }
+        )
+        self.session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=_API_POOL_MAXSIZE,
+                max_retries=_API_RETRY,
+            ),
+        )
+        # Requests uses the adapter with the longest matching prefix
+        self.session.mount(
+            f"{GITHUB_API_URL}/repos/{repo_owner}/{repo_name}/forks",
+            HTTPAdapter(max_retries=_FORK_RETRY),
+        )
+
     def _run(
         self,
         cmd: list[str],
@@ -66,7 +157,12 @@ class GitHubAutomation:
         logging.debug("RUN: %s (cwd=%s)", " ".join(cmd), cwd_str)
         try:
             return subprocess.run(
-                cmd, cwd=cwd_str, check=check, capture_output=capture_output, text=text
+                cmd,
+                cwd=cwd_str,
+                check=check,
+                capture_output=capture_output,
+                text=text,
+                env=self._git_env,
             )
         except subprocess.CalledProcessError as e:
             stdout = e.stdout or ""
@@ -105,25 +201,61 @@ class GitHubAutomation:
     def fork_repository(self) -> None:
         """Fork the repository to the user's GitHub account."""
         logging.info("Forking repository...")
-        url = f"https://api.github.com/repos/{self.repo_owner}/{self.repo_name}/forks"
-        headers = {"Authorization": f"token {self.token}"}
-        response = requests.post(url, headers=headers, timeout=60)
+        url = f"{GITHUB_API_URL}/repos/{self.repo_owner}/{self.repo_name}/forks"
+        response = self.session.post(url, timeout=60)
         response.raise_for_status()
         logging.info("Repository forked to %s/%s", self.username, self.repo_name)
 
-    def clone_sync_repository(self) -> None:
-        """Clone the forked repository locally if missing; otherwise fetch & fast-forward origin."""
+    def clone_sync_repository(self, base_branch: str = "main") -> None:
+        """Clone the forked repository locally if missing; otherwise fetch & fast-forward origin.
+
+        Args:
+            base_branch: The branch to clone; other branches of the fork are
+                not fetched.
+        """
         repo = self._ensure_repo_dir()
         git_dir = repo / ".git"
 
         if not git_dir.exists():
             logging.info("Cloning fork: %s -> %s", self.origin_repo_url, repo)
-            self._run(["git", "clone", self.origin_repo_url, str(repo)], cwd=".")
-            # Ensure default branch is tracked locally (we don't assume 'main')
-            # This will be handled by later sync step.
+            # Blobless clone of the base branch only: fetch its full commit
+            # history (needed to merge upstream) but only the file contents
+            # of the checked-out tree, and no other branches or tags
+            self._run(
+                [
+                    "git",
+                    "clone",
+                    "--quiet",
+                    "--filter=blob:none",
+                    "--single-branch",
+                    "--no-tags",
+                    "--branch",
+                    base_branch,
+                    self.origin_repo_url,
+                    repo.name,
+                ],
+                # Explicit cwd: never depend on the process working directory
+                cwd=repo.parent,
+            )
+        elif self.keep_clone:
+            logging.info("Reusing local clone at %s; fetching from origin.", repo)
+            # The token in the origin URL may have changed since the clone
+            self._run_git(
+                ["remote", "set-url", "origin", self.origin_repo_url], cwd=repo
+            )
+            self._run_git(
+                ["fetch", "--quiet", "--prune", "origin", base_branch], cwd=repo
+            )
+            # The clone is owned by the automation: start from the fetched base
+            # branch, dropping anything left over from an unfinished run
+            self._run_git(
+                ["checkout", "--quiet", "--force", "-B", base_branch, "FETCH_HEAD"],
+                cwd=repo,
+            )
+            self._run_git(["clean", "--quiet", "-fd"], cwd=repo)
         else:
             logging.info("Local clone exists; fetching latest from origin.")
-            self._run_git(["fetch", "--all", "--prune"], cwd=repo)
+            self._run_git(["fetch", "--quiet", "--all", "--prune"], cwd=repo)
 
         # Always ensure we have the upstream remote configured
         self._ensure_upstream_remote()
@@ -144,8 +276,8 @@ class GitHubAutomation:
 
         # Make sure remotes are present and fresh
         self._ensure_upstream_remote()
-        self._run_git(["fetch", "upstream", base_branch], cwd=repo)
-        self._run_git(["fetch", "origin", base_branch], cwd=repo)
+        self._run_git(["fetch", "--quiet", "upstream", base_branch], cwd=repo)
+        self._run_git(["fetch", "--quiet", "origin", base_branch], cwd=repo)
 
         # Ensure we have a local branch for base_branch
         local_branches = self._git_output(["branch"])
@@ -172,7 +304,9 @@ class GitHubAutomation:
             raise ValueError("strategy must be one of: 'ff', 'rebase', 'merge'")
 
         # Push updated base branch to fork
-        self._run_git(["push", "origin", base_branch], cwd=repo)
+        self._run_git(
+            ["push", "--quiet", "--no-verify", "origin", base_branch], cwd=repo
+        )
         logging.info(
             "Fork origin/%s is now aligned with upstream/%s.", base_branch, base_branch
         )
@@ -187,12 +321,9 @@ class GitHubAutomation:
         # -B creates or resets the branch to the current HEAD of from_branch
         self._run_git(["checkout", "-B", branch_name], cwd=repo)
 
-    def add_file(self, file_path: str, content: Any) -> None:
-        """Add a new file (serialized to JSON) to the local repository and stage it."""
-        repo = self._ensure_repo_dir()
-        full_path = Path(repo) / file_path
-        full_path.parent.mkdir(parents=True, exist_ok=True)
-
+    @staticmethod
+    def _serialize_json(file_path: str, content: Any) -> bytes:
+        """Serialize the content of file_path to JSON bytes."""
         # Normalize content to something JSON serializable
         if hasattr(content, "to_dict"):
             content = content.to_dict()
@@ -200,32 +331,61 @@ class GitHubAutomation:
             raise TypeError(f"Cannot serialize content of type {type(content)}")
 
         try:
-            json_content = json.dumps(
-                content, indent=2, ensure_ascii=False, default=serialize
-            )
+            return to_json_bytes(content)
         except TypeError as e:
             raise RuntimeError(
                 f"JSON serialization failed for '{file_path}': {e}"
             ) from e
 
-        full_path.write_text(json_content, encoding="utf-8")
+    @classmethod
+    def _write_json_file(cls, repo: Path, file_path: str, content: Any) -> Path:
+        """Serialize content to JSON and write it to file_path within repo."""
+        json_content = cls._serialize_json(file_path, content)
+        full_path = repo / file_path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_bytes(json_content)
+        return full_path
+
+    def add_file(self, file_path: str, content: Any) -> None:
+        """Add a new file (serialized to JSON) to the local repository and stage it."""
+        repo = self._ensure_repo_dir()
+        full_path = self._write_json_file(repo, file_path, content)
         self._run_git(["add", str(full_path)], cwd=repo)
         logging.info("Added and staged file: %s", file_path)
 
+    def add_files(self, files: dict[str, Any]) -> None:
+        """Add several files (serialized to JSON) and stage them with a single
+        ``git add``, instead of one git process and index update per file."""
+        if not files:
+            return
+        repo = self._ensure_repo_dir()
+        full_paths = [
+            str(self._write_json_file(repo, file_path, content))
+            for file_path, content in files.items()
+        ]
+        self._run_git(["add", "--", *full_paths], cwd=repo)
+        logging.info("Added and staged %d files.", len(full_paths))
+
     def commit_and_push(self, branch_name: str, commit_message: str) -> None:
         """Commit staged changes on the branch and push to origin."""
         repo = self._ensure_repo_dir()
         logging.info("Committing and pushing changes on '%s'...", branch_name)
 
         self._run_git(["checkout", branch_name], cwd=repo)
+        # Hooks are skipped: the automation account commits generated files
+        # only, and hooks from the clone would just add interpreter start-ups
         try:
-            self._run_git(["commit", "-m", commit_message], cwd=repo)
+            self._run_git(
+                ["commit", "--quiet", "--no-verify", "-m", commit_message], cwd=repo
+            )
         except RuntimeError as e:
             if "nothing to commit" in str(e).lower():
                 logging.info("Nothing to commit on '%s'; pushing anyway.", branch_name)
             else:
                 raise
-        self._run_git(["push", "-u", "origin", branch_name], cwd=repo)
+        self._run_git(
+            ["push", "--quiet", "--no-verify", "-u", "origin", branch_name], cwd=repo
+        )
 
     def create_pull_request(
         self, branch_name: str, pr_title: str, pr_body: str, base_branch: str = "main"
@@ -238,27 +398,189 @@ class GitHubAutomation:
         logging.info(
             "Creating pull request '%s' -> base:%s ...", branch_name, base_branch
         )
-        url = f"https://api.github.com/repos/{self.repo_owner}/{self.repo_name}/pulls"
-        headers = {"Authorization": f"token {self.token}"}
+        url = f"{GITHUB_API_URL}/repos/{self.repo_owner}/{self.repo_name}/pulls"
         data = {
             "title": pr_title,
             "head": f"{self.username}:{branch_name}",
             "base": base_branch,
             "body": pr_body,
         }
-        response = requests.post(url, headers=headers, json=data, timeout=60)
+        response = self.session.post(url, json=data, timeout=60)
         response.raise_for_status()
         pr_url = response.json().get("html_url", "")
         logging.info("Pull request created: %s", pr_url)
         return pr_url
 
+    def _fork_api_url(self, path: str) -> str:
+        """Return the REST API URL of a resource within the user's fork."""
+        return f"{GITHUB_API_URL}/repos/{self.username}/{self.repo_name}/{path}"
+
+    def _gql(self, query: str, variables: dict[str, Any]) -> dict[str, Any]:
+        """Run a GraphQL query against the GitHub API and return its data.
+
+        Raises:
+            RuntimeError: If the query returns errors.
+        """
+        response = self.session.post(
+            GITHUB_GRAPHQL_URL,
+            json={"query": query, "variables": variables},
+            timeout=60,
+        )
+        response.raise_for_status()
+        result = response.json()
+        if result.get("errors"):
+            raise RuntimeError(f"GitHub GraphQL query failed: {result['errors']}")
+        return result["data"]
+
+    def get_branch_head(self, branch_name: str) -> tuple[str, str]:
+        """Return the SHAs of the head commit of a branch in the fork and of
+        its tree, fetched with a single GraphQL request.
+
+        Raises:
+            ValueError: If the branch does not exist in the fork.
+        """
+        data = self._gql(
+            _BRANCH_HEAD_QUERY,
+            {
+                "owner": self.username,
+                "name": self.repo_name,
+                "ref": f"refs/heads/{branch_name}",
+            },
+        )
+        ref = (data.get("repository") or {}).get("ref")
+        if ref is None:
+            raise ValueError(
+                f"Branch '{branch_name}' not found in {self.username}/{self.repo_name}"
+            )
+        return ref["target"]["oid"], ref["target"]["tree"]["oid"]
+
+    def create_remote_branch(self, branch_name: str, sha: str) -> None:
+        """Create a branch in the fork at the given commit via the REST API.
+
+        Like ``create_branch``, an existing branch of the same name is reset
+        to the commit. No local clone is needed.
+        """
+        logging.info("Creating remote branch '%s' at %s ...", branch_name, sha)
+        response = self.session.post(
+            self._fork_api_url("git/refs"),
+            json={"ref": f"refs/heads/{branch_name}", "sha": sha},
+            timeout=60,
+        )
+        if response.status_code == 422:
+            # Reference already exists
+            response = self.session.patch(
+                self._fork_api_url(f"git/refs/heads/{branch_name}"),
+                json={"sha": sha, "force": True},
+                timeout=60,
+            )
+        response.raise_for_status()
+
+    def _post_json(self, path: str, data: dict) -> Any:
+        """POST to a resource within the fork and return the JSON response."""
+        response = self.session.post(self._fork_api_url(path), json=data, timeout=60)
+        response.raise_for_status()
+        return response.json()
+
+    def _create_blob(self, file_path: str, content: Any) -> str:
+        """Upload content (serialized to JSON) as a blob and return its SHA."""
+        blob = self._post_json(
+            "git/blobs",
+            {
+                "content": base64.b64encode(
+                    self._serialize_json(file_path, content)
+                ).decode("ascii"),
+                "encoding": "base64",
+            },
+        )
+        return blob["sha"]
+
+    def _repo_path(self, file_path: str | Path) -> str:
+        """Return file_path relative to the repository root, in POSIX form.
+
+        Publisher keys its files by their path within the local clone, which
+        git accepts as is, but the Git Data API only accepts repo-relative
+        paths.
+        """
+        path = Path(file_path)
+        if path.is_absolute():
+            path = path.relative_to(self.local_clone_dir)
+        return path.as_posix()
+
+    def commit_files_via_api(
+        self,
+        branch_name: str,
+        files: dict[str, Any],
+        commit_message: str,
+        base_branch: str = "main",
+    ) -> str:
+        """Commit several files (serialized to JSON) as a single commit on a
+        branch of the fork via the Git Data API, without a local clone.
+
+        Blobs for the files are uploaded concurrently, then one tree and one
+        commit on top of the head of base_branch are created, and branch_name
+        is created at (or reset to) that commit.
+
+        Returns:
+            The SHA of the new commit.
+        """
+        base_sha, base_tree = self.get_branch_head(base_branch)
+        # Blob uploads are independent, so they run concurrently on the
+        # session's connection pool; the tree and commit depend on all of them
+        with ThreadPoolExecutor(
+            max_workers=min(_API_POOL_MAXSIZE, max(len(files), 1))
+        ) as executor:
+            blob_shas = list(executor.map(self._create_blob, files, files.values()))
+        tree_entries = [
+            {
+                "path": self._repo_path(file_path),
+                "mode": "100644",
+                "type": "blob",
+                "sha": blob_sha,
+            }
+            for file_path, blob_sha in zip(files, blob_shas)
+        ]
+        tree = self._post_json(
+            "git/trees", {"base_tree": base_tree, "tree": tree_entries}
+        )
+        commit = self._post_json(
+            "git/commits",
+            {"message": commit_message, "tree": tree["sha"], "parents": [base_sha]},
+        )
+        self.create_remote_branch(branch_name, commit["sha"])
+        logging.info(
+            "Committed %d files on '%s' via API.", len(tree_entries), branch_name
+        )
+        return commit["sha"]
+
+    def sync_fork_via_api(self, base_branch: str = "main") -> None:
+        """Update the fork's base branch from upstream via the REST API.
+
+        The API counterpart of ``sync_fork_with_upstream``; GitHub merges (or
+        fast-forwards) the upstream branch into the fork's branch.
+        """
+        logging.info("Syncing fork branch '%s' with upstream via API...", base_branch)
+        response = self.session.post(
+            self._fork_api_url("merge-upstream"),
+            json={"branch": base_branch},
+            timeout=60,
+        )
+        response.raise_for_status()
+
     def clean_up(self) -> None:
-        """Remove the local cloned repository directory."""
+        """Remove the local cloned repository directory (unless ``keep_clone``
+        is set) and close the API session."""
+        self.session.close()
         repo = Path(self.local_clone_dir)
+        if self.keep_clone:
+            logging.info("Keeping local repository at %s for reuse.", repo)
+            return
         logging.info("Cleaning up local repository at %s ...", repo)
         try:
             if repo.exists():
-                shutil.rmtree(repo)
+                if sys.version_info >= (3, 12):
+                    shutil.rmtree(repo, onexc=_remove_readonly)
+                else:
+                    shutil.rmtree(repo, onerror=_remove_readonly)
         except Exception as e:
             raise RuntimeError(
                 f"Failed to clean up local repository '{repo}': {e}"
@@ -270,3 +592,112 @@ class GitHubAutomation:
         exists = full_path.is_file()
         logging.debug("Checking existence of %s: %s", full_path, exists)
         return exists
+
+
+_T = TypeVar("_T")
+
+
+class AsyncGitHubAutomation:
+    """Asyncio interface to ``GitHubAutomation``, so that pull requests for
+    several datasets can be prepared concurrently on one event loop.
+
+    Every call runs the blocking ``GitHubAutomation`` method (an API request
+    or a git subprocess) in a worker thread. Each instance owns its own
+    session and clone, so instances used concurrently must be given distinct
+    ``local_clone_dir`` values.
+
+    Args:
+        See ``GitHubAutomation``.
+    """
+
+    def __init__(
+        self,
+        username: str,
+        token: str,
+        repo_owner: str,
+        repo_name: str,
+        local_clone_dir: str | None = None,
+        keep_clone: bool = False,
+    ):
+        self.automation = GitHubAutomation(
+            username,
+            token,
+            repo_owner,
+            repo_name,
+            local_clone_dir=local_clone_dir,
+            keep_clone=keep_clone,
+        )
+
+    async def fork_repository(self) -> None:
+        await asyncio.to_thread(self.automation.fork_repository)
+
+    async def clone_sync_repository(self, base_branch: str = "main") -> None:
+        await asyncio.to_thread(self.automation.clone_sync_repository, base_branch)
+
+    async def sync_fork_with_upstream(
+        self, base_branch: str = "main", strategy: str = "merge"
+    ) -> None:
+        await asyncio.to_thread(
+            self.automation.sync_fork_with_upstream, base_branch, strategy
+        )
+
+    async def create_branch(self, branch_name: str, from_branch: str = "main") -> None:
+        await asyncio.to_thread(self.automation.create_branch, branch_name, from_branch)
+
+    async def add_files(self, files: dict[str, Any]) -> None:
+        await asyncio.to_thread(self.automation.add_files, files)
+
+    async def commit_and_push(self, branch_name: str, commit_message: str) -> None:
+        await asyncio.to_thread(
+            self.automation.commit_and_push, branch_name, commit_message
+        )
+
+    async def sync_fork_via_api(self, base_branch: str = "main") -> None:
+        await asyncio.to_thread(self.automation.sync_fork_via_api, base_branch)
+
+    async def commit_files_via_api(
+        self,
+        branch_name: str,
+        files: dict[str, Any],
+        commit_message: str,
+        base_branch: str = "main",
+    ) -> str:
+        return await asyncio.to_thread(
+            self.automation.commit_files_via_api,
+            branch_name,
+            files,
+            commit_message,
+            base_branch,
+        )
+
+    async def create_pull_request(
+        self, branch_name: str, pr_title: str, pr_body: str, base_branch: str = "main"
+    ) -> str:
+        return await asyncio.to_thread(
+            self.automation.create_pull_request,
+            branch_name,
+            pr_title,
+            pr_body,
+            base_branch,
+        )
+
+    async def clean_up(self) -> None:
+        await asyncio.to_thread(self.automation.clean_up)
+
+
+async def gather_limited(
+    awaitables: Iterable[Awaitable[_T]], limit: int = 4
+) -> list[_T]:
+    """Await all awaitables concurrently, at most ``limit`` at a time, and
+    return their results in order.
+
+    Bounds the number of pull requests prepared at once, which keeps the
+    worker threads, clones and GitHub API requests in flight within reason.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(awaitable: Awaitable[_T]) -> _T:
+        async with semaphore:
+            return await awaitable
+
+    return await asyncio.gather(*(run(awaitable) for awaitable in awaitables))
@@ -1,10 +1,41 @@
+import hashlib
+import json
 import logging
 import os
-from typing import Optional
+from typing import Any, Iterable, Optional
 
+import jsonschema
+import orjson
 import xarray as xr
 from xcube.core.store import new_data_store
 
+# botocore client settings for the default S3 stores. The connection pool is
+# sized for parallel chunk reads (botocore defaults to 10 connections).
+DEFAULT_S3_CONFIG_KWARGS = {
+    "max_pool_connections": 64,
+    "retries": {"max_attempts": 5, "mode": "adaptive"},
+}
+
+# Environment variables configuring access to the user's team storage bucket
+S3_USER_STORAGE_ENV_VARS = (
+    "S3_USER_STORAGE_BUCKET",
+    "S3_USER_STORAGE_KEY",
+    "S3_USER_STORAGE_SECRET",
+)
+
+
+def s3_credentials_key() -> str:
+    """Return a digest of the user storage credentials in the environment.
+
+    Used as part of cache keys, so that cached objects opened with one set of
+    credentials are not reused after the credentials change, without keeping
+    the secrets themselves in the cache.
+    """
+    credentials = "\0".join(
+        os.environ.get(name, "") for name in S3_USER_STORAGE_ENV_VARS
+    )
+    return hashlib.sha256(credentials.encode("utf-8")).hexdigest()
+
 
 def serialize(obj):
     """Convert non-serializable objects to JSON-compatible formats.
@@ -15,18 +46,127 @@ def serialize(obj):
     Raises:
         TypeError: If the object cannot be serialized.
     """
-    if isinstance(obj, set):
+    if isinstance(obj, (set, frozenset)):
         return list(obj)
-    if hasattr(obj, "__dict__"):
-        return obj.__dict__
+    attrs = getattr(obj, "__dict__", None)
+    if attrs is not None:
+        return attrs
     raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
 
+def to_json_bytes(content) -> bytes:
+    """Serialize content to UTF-8 encoded, 2-space indented JSON.
+
+    Uses orjson, which produces bytes directly instead of building an
+    intermediate ``str`` that is then re-encoded on write. Numpy scalars and
+    arrays are serialized natively; other non-JSON objects go through
+    ``serialize``.
+
+    Raises:
+        TypeError: If the content cannot be serialized.
+    """
+    return orjson.dumps(
+        content,
+        default=serialize,
+        option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY,
+    )
+
+
+def write_records_ndjson(path: str | os.PathLike, records: Iterable[Any]) -> int:
+    """Write records as newline-delimited JSON (one compact record per line).
+
+    All records go through a single buffered file handle instead of one file
+    per record. Records with a ``to_dict`` method (e.g. OGC API records) are
+    converted with it first.
+
+    Args:
+        path: Path of the file to write.
+        records: The records to write.
+
+    Returns:
+        The number of records written.
+    """
+    count = 0
+    with open(path, "wb", buffering=1 << 20) as f:
+        for record in records:
+            if hasattr(record, "to_dict"):
+                record = record.to_dict()
+            f.write(
+                orjson.dumps(
+                    record,
+                    default=serialize,
+                    option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE,
+                )
+            )
+            count += 1
+    return count
+
+
+# Data stores shared within the process, keyed by storage type, root and a
+# digest of the storage options (so credentials never appear in the keys)
+_DATA_STORES: dict[tuple[str, str, str], Any] = {}
+
+
+def _get_data_store(storage_type: str, root: str, storage_options: dict):
+    """Return a cached data store for the given storage configuration.
+
+    Creating a store sets up a new filesystem session (e.g. an
+    ``s3fs.S3FileSystem``) with its own connection pool and listings cache,
+    so stores are reused within the process.
+    """
+    options_digest = hashlib.sha256(
+        json.dumps(storage_options, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    key = (storage_type, root, options_digest)
+    store = _DATA_STORES.get(key)
+    if store is None:
+        store = _DATA_STORES[key] = new_data_store(
+            storage_type, root=root, storage_options=storage_options
+        )
+    return store
+
+
+def _open_data(store, dataset_id: str, open_params: Optional[dict], logger):
+    """Open a dataset from a store with the given open parameters.
+
+    If the parameters do not validate against the store's open schema, the
+    dataset is opened with the store defaults. A Zarr opened with
+    ``consolidated=True`` that has no consolidated metadata is retried
+    unconsolidated with the remaining parameters kept.
+    """
+    if not open_params:
+        return store.open_data(dataset_id)
+    try:
+        store.get_open_data_params_schema(dataset_id).validate_instance(open_params)
+    except jsonschema.ValidationError as e:
+        logger.warning(
+            "Store rejected open parameters %s for dataset '%s' (%s); opening "
+            "it with the store defaults.",
+            open_params,
+            dataset_id,
+            e.message,
+        )
+        return store.open_data(dataset_id)
+    try:
+        return store.open_data(dataset_id, **open_params)
+    except (KeyError, FileNotFoundError) as e:
+        if not open_params.get("consolidated"):
+            raise
+        logger.warning(
+            "Dataset '%s' has no consolidated metadata (%s); opening it "
+            "unconsolidated.",
+            dataset_id,
+            e,
+        )
+        return store.open_data(dataset_id, **{**open_params, "consolidated": False})
+
+
 def open_dataset(
     dataset_id: str,
     root: str = "deep-esdl-public",
     storage_configs: Optional[list[dict]] = None,
     logger: Optional[logging.Logger] = None,
+    open_params: Optional[dict] = None,
 ) -> xr.Dataset:
     """Open an xarray dataset from a specified store.
 
@@ -36,6 +176,10 @@ def open_dataset(
         root: Root path or bucket for the store. Defaults to 'deep-esdl-public'.
         storage_configs: List of storage configurations. If None, uses default S3 configs.
         logger: Optional logger for logging messages. If None, uses default logger.
+        open_params: Optional parameters passed to the store's ``open_data``
+            (e.g. ``{"consolidated": True}``). If they do not validate against
+            the store's open schema, the dataset is opened with the store
+            defaults instead.
 
     Returns:
         xarray.Dataset: The opened dataset.
@@ -53,24 +197,36 @@ def open_dataset(
             "params": {
                 "storage_type": "s3",
                 "root": root,
-                "storage_options": {"anon": True},
-            },
-        },
-        {
-            "description": "Authenticated store",
-            "params": {
-                "storage_type": "s3",
-                "root": os.environ.get("S3_USER_STORAGE_BUCKET", root),
                 "storage_options": {
-                    "anon": False,
-                    **({
-                        "key": os.environ["S3_USER_STORAGE_KEY"],
-                        "secret": os.environ["S3_USER_STORAGE_SECRET"],
-                    } if os.environ.get("S3_USER_STORAGE_KEY") and os.environ.get("S3_USER_STORAGE_SECRET") else {}),
+                    "anon": True,
+                    "config_kwargs": DEFAULT_S3_CONFIG_KWARGS,
                 },
             },
         },
     ]
+    # Only try the user store if a bucket is configured; otherwise the attempt
+    # is bound to fail, but only after a full S3 retry/backoff cycle. Without
+    # a key and secret, s3fs uses the ambient AWS credential chain.
+    user_bucket = os.environ.get("S3_USER_STORAGE_BUCKET")
+    if user_bucket:
+        user_storage_options = {
+            "anon": False,
+            "config_kwargs": DEFAULT_S3_CONFIG_KWARGS,
+        }
+        user_key = os.environ.get("S3_USER_STORAGE_KEY")
+        user_secret = os.environ.get("S3_USER_STORAGE_SECRET")
+        if user_key and user_secret:
+            user_storage_options.update(key=user_key, secret=user_secret)
+        default_configs.append(
+            {
+                "description": "Authenticated store",
+                "params": {
+                    "storage_type": "s3",
+                    "root": user_bucket,
+                    "storage_options": user_storage_options,
+                },
+            }
+        )
 
     # Use provided configs or default
     configs = storage_configs or default_configs
@@ -79,27 +235,43 @@ def open_dataset(
     last_exception = None
     tried_configurations = []
     for config in configs:
+        params = config["params"]
+        if params["storage_type"] == "s3" and params.get("root") is None:
+            # Without a bucket the attempt can only fail after a network round
+            # trip. An empty root is valid: the bucket is then part of the ID.
+            logger.debug(
+                "Skipping configuration without bucket: %s", config["description"]
+            )
+            continue
         tried_configurations.append(config["description"])
         try:
             logger.info(
-                f"Attempting to open dataset '{dataset_id}' with configuration: "
-                f"{config['description']}"
+                "Attempting to open dataset '%s' with configuration: %s",
+                dataset_id,
+                config["description"],
             )
-            store = new_data_store(
-                config["params"]["storage_type"],
-                root=config["params"]["root"],
-                storage_options=config["params"]["storage_options"],
+            store = _get_data_store(
+                params["storage_type"], params["root"], params["storage_options"]
             )
-            dataset = store.open_data(dataset_id)
+            config_kwargs = params["storage_options"].get("config_kwargs", {})
+            if "max_pool_connections" in config_kwargs:
+                logger.debug(
+                    "S3 connection pool size: %s",
+                    config_kwargs["max_pool_connections"],
+                )
+            dataset = _open_data(store, dataset_id, open_params, logger)
             logger.info(
-                f"Successfully opened dataset '{dataset_id}' with configuration: "
-                f"{config['description']}"
+                "Successfully opened dataset '%s' with configuration: %s",
+                dataset_id,
+                config["description"],
             )
             return dataset
         except Exception as e:
             logger.error(
-                f"Failed to open dataset '{dataset_id}' with configuration: "
-                f"{config['description']}. Error: {e}"
+                "Failed to open dataset '%s' with configuration: %s. Error: %s",
+                dataset_id,
+                config["description"],
+                e,
             )
             last_exception = e
 
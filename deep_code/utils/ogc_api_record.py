@@ -13,6 +13,58 @@ from deep_code.constants import (
     PROJECT_COLLECTION_NAME,
 )
 
+# Link templates shared by all workflow and experiment records. Records get
+# shallow copies, so the templates themselves are never mutated; links with
+# nested values are built by functions instead.
+_ROOT_LINK = {
+    "rel": "root",
+    "href": "../../catalog.json",
+    "type": "application/json",
+    "title": "Open Science Catalog",
+}
+_WORKFLOWS_PARENT_LINK = {
+    "rel": "parent",
+    "href": "../catalog.json",
+    "type": "application/json",
+    "title": "Workflows",
+}
+_EXPERIMENTS_PARENT_LINK = {
+    "rel": "parent",
+    "href": "../catalog.json",
+    "type": "application/json",
+    "title": "Experiments",
+}
+_PROJECT_LINK = {
+    "rel": "related",
+    "href": f"../../projects/{PROJECT_COLLECTION_NAME}/collection.json",
+    "type": "application/json",
+    "title": "Project: DeepESDL",
+}
+_INPUT_LINK = {
+    "rel": "input",
+    "href": "./input.yaml",
+    "type": "application/yaml",
+    "title": "Input parameters",
+}
+_ENVIRONMENT_LINK = {
+    "rel": "environment",
+    "href": "./environment.yaml",
+    "type": "application/yaml",
+    "title": "Execution environment",
+}
+
+
+def _platform_link() -> dict[str, Any]:
+    """Return a new link to the originating platform (it has a nested list)."""
+    return {
+        "rel": "application-originating-platform",
+        "title": "DeepESDL platform",
+        "href": "https://deep.earthsystemdatalab.net/",
+        "type": "text/html",
+        "application:platform_supports": ["jupyter-notebook"],
+        "application:preferred_app": "JupyterLab",
+    }
+
 
 class Contact(MappingConstructible["Contact"], JsonSerializable):
     def __init__(
@@ -110,6 +162,8 @@ class RecordProperties(MappingConstructible["RecordProperties"], JsonSerializabl
 
 
 class LinksBuilder:
+    __slots__ = ("themes", "jupyter_kernel_info", "theme_links")
+
     def __init__(self, themes: list[str], jupyter_kernel_info: dict[str]):
         self.themes = themes
         self.jupyter_kernel_info = jupyter_kernel_info
@@ -280,38 +334,16 @@ class WorkflowAsOgcRecord(MappingConstructible["OgcRecord"], JsonSerializable):
     def _generate_static_links(self):
         """Generates static links (root and parent) for the record."""
         return [
-            {
-                "rel": "root",
-                "href": "../../catalog.json",
-                "type": "application/json",
-                "title": "Open Science Catalog",
-            },
-            {
-                "rel": "parent",
-                "href": "../catalog.json",
-                "type": "application/json",
-                "title": "Workflows",
-            },
+            {**_ROOT_LINK},
+            {**_WORKFLOWS_PARENT_LINK},
             {
                 "rel": "jupyter-notebook",
                 "type": "application/json",
                 "title": "Jupyter Notebook",
                 "href": f"{self.jupyter_notebook_url}",
             },
-            {
-                "rel": "application-originating-platform",
-                "title": "DeepESDL platform",
-                "href": "https://deep.earthsystemdatalab.net/",
-                "type": "text/html",
-                "application:platform_supports": ["jupyter-notebook"],
-                "application:preferred_app": "JupyterLab",
-            },
-            {
-                "rel": "related",
-                "href": f"../../projects/{PROJECT_COLLECTION_NAME}/collection.json",
-                "type": "application/json",
-                "title": "Project: DeepESDL",
-            },
+            _platform_link(),
+            {**_PROJECT_LINK},
             {
                 "rel": "self",
                 "href": f"{BASE_URL_OSC}/workflows/{self.id}/record.json",
@@ -352,50 +384,18 @@ class ExperimentAsOgcRecord(MappingConstructible["OgcRecord"], JsonSerializable)
     def _generate_static_links(self):
         """Generates static links (root and parent) for the record."""
         return [
-            {
-                "rel": "root",
-                "href": "../../catalog.json",
-                "type": "application/json",
-                "title": "Open Science Catalog",
-            },
-            {
-                "rel": "parent",
-                "href": "../catalog.json",
-                "type": "application/json",
-                "title": "Experiments",
-            },
+            {**_ROOT_LINK},
+            {**_EXPERIMENTS_PARENT_LINK},
             {
                 "rel": "related",
                 "href": f"../../workflows/{self.id}/record.json",
                 "type": "application/json",
                 "title": f"Workflow: {self.title}",
             },
-            {
-                "rel": "related",
-                "href": f"../../projects/{PROJECT_COLLECTION_NAME}/collection.json",
-                "type": "application/json",
-                "title": "Project: DeepESDL",
-            },
-            {
-                "rel": "application-originating-platform",
-                "title": "DeepESDL platform",
-                "href": "https://deep.earthsystemdatalab.net/",
-                "type": "text/html",
-                "application:platform_supports": ["jupyter-notebook"],
-                "application:preferred_app": "JupyterLab",
-            },
-            {
-                "rel": "input",
-                "href": "./input.yaml",
-                "type": "application/yaml",
-                "title": "Input parameters",
-            },
-            {
-                "rel": "environment",
-                "href": "./environment.yaml",
-                "type": "application/yaml",
-                "title": "Execution environment",
-            },
+            {**_PROJECT_LINK},
+            _platform_link(),
+            {**_INPUT_LINK},
+            {**_ENVIRONMENT_LINK},
             {
                 "rel": "self",
                 "href": f"{BASE_URL_OSC}/experiments/{self.id}/record.json",
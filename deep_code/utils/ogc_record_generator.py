@@ -19,6 +19,10 @@ class OSCWorkflowOGCApiRecordGenerator:
     """Generates OGC API record for a workflow
     """
 
+    def __init__(self):
+        # One timestamp per generator run, so all records built by it agree
+        self._now_iso = datetime.now(timezone.utc).isoformat()
+
     @staticmethod
     def build_contact_objects(contacts_list: list[dict]) -> list[Contact]:
         """Build a list of Contact objects from a list of contact dictionaries.
@@ -30,7 +34,8 @@ class OSCWorkflowOGCApiRecordGenerator:
             Returns:
                 A list of Contact instances.
             """
-        return [Contact.from_value(cdict) for cdict in contacts_list]
+        from_value = Contact.from_value
+        return [from_value(cdict) for cdict in contacts_list]
 
     @staticmethod
     def build_theme(osc_themes: list[str]) -> Theme:
@@ -51,17 +56,14 @@ class OSCWorkflowOGCApiRecordGenerator:
         Returns:
             A RecordProperties object.
         """
-        now_iso = datetime.now(timezone.utc).isoformat()
-        properties.update({"created": now_iso})
-        properties.update({"updated": now_iso})
+        # Work on a copy; the caller's dict (the workflow config) is not changed
+        properties = dict(properties)
+        properties["created"] = properties["updated"] = self._now_iso
+        properties["contacts"] = self.build_contact_objects(contacts)
 
         themes_list = properties.get("themes", [])
-
-        properties.update({"contacts": self.build_contact_objects(contacts)})
-
         if themes_list:
-            theme_obj = self.build_theme(themes_list)
-            properties.update({"themes": [theme_obj]})
+            properties["themes"] = [self.build_theme(themes_list)]
 
         properties.setdefault("type", "workflow")
         properties.setdefault("osc_project", "deep-earth-system-data-lab")